@@ -2,7 +2,7 @@
 from __future__ import nested_scopes, generators, with_statement, unicode_literals, absolute_import, division, print_function
 
 # import from modules for fast access
-from .graph import Graph
+from .graph import Graph, GraphTemplate, Monitor, UnknownInputError
 from .node import Node, Ptype
 # standard node database
 from . import nodes
\ No newline at end of file
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Runs graph files without the GUI, e.g.:
+	python -m flow run examples/loop.json --repeat 10 --warmup 2
+	python -m flow run examples/loop.json --set "Float out.value=3" --format ndjson
+	python -m flow run examples/loop.json --stages 2
+	python -m flow sweep examples/loop.json --grid "Float out.value=[1, 2, 3]" --workers 4
+	python -m flow serve examples/loop.json examples/array.json --port 8080
+	python -m flow loadtest http://127.0.0.1:8080/graphs/loop --requests 1000 --concurrency 8
+'''
+from __future__ import nested_scopes, generators, with_statement, unicode_literals, absolute_import, division, print_function
+
+import argparse # for parsing the command line
+import json # for parsing overrides and formatting the output
+import logging # for setting the log level
+import sys # for the output stream
+from timeit import default_timer # for measuring the phases
+from .graph import Graph, UnknownInputError
+from .pipeline import Pipeline
+
+def parseDefault(text):
+	'''
+	:param text: string like "nodeName.inputName=value", 
+		where the value is JSON or else taken as string
+	:returns: tuple with "nodeName.inputName" and the value
+	'''
+	key, sep, valStr = text.partition('=')
+	if not sep or '.' not in key:
+		raise argparse.ArgumentTypeError(
+			'{} is not like "nodeName.inputName=value"'.format(text))
+	try:
+		value = json.loads(valStr)
+	except ValueError:
+		value = valStr # no JSON, so it's a string
+	return key, value
+
+
+def timeStats(times):
+	'''
+	:param times: list of durations in seconds
+	:returns: dictionary with min, mean, max and total duration
+	'''
+	if not times:
+		return None
+	return {'min': min(times), 'mean': sum(times)/len(times), 
+		'max': max(times), 'total': sum(times)}
+
+
+def writeJson(stream, obj, indent=None):
+	'''
+	Writes an object as JSON. Results which are no JSON types are written as strings
+	'''
+	stream.write(json.dumps(obj, indent=indent, default=str)+'\n')
+	stream.flush()
+
+
+def runGraph(args, stream=sys.stdout):
+	'''
+	Loads and processes a graph as specified by the command line arguments
+
+	:param args: parsed arguments of the "run" command
+	:param stream: where to write the output to
+	'''
+	# load
+	startTime = default_timer()
+	graph = Graph(args.graph)
+	if args.defaults:
+		graph.setDefaults(dict(args.defaults))
+	loadTime = default_timer()-startTime
+	pipeline = Pipeline(graph, args.stages) if args.stages > 1 else None
+	
+	profiler = None
+	if args.profile:
+		import cProfile # only when needed
+		profiler = cProfile.Profile()
+	
+	# streamed values are JSON lines, so the rest must be too
+	ndjson = args.format == 'ndjson' or args.stream
+	prepareTimes = []
+	processTimes = []
+	for run in range(args.warmup+args.repeat):
+		warmup = run < args.warmup
+		# prepare
+		startTime = default_timer()
+		graph.prepare()
+		prepareTime = default_timer()-startTime
+		# process
+		if profiler and not warmup:
+			profiler.enable()
+		startTime = default_timer()
+		if args.stream and not warmup:
+			# write every value of unconnected outputs while processing
+			for node, out, value in graph.stream():
+				writeJson(stream, {'node': node.name, 'output': out.name, 'result': value})
+			results, iterCount = graph.getResults(), graph.iterCount
+		elif pipeline:
+			results, iterCount, _ = pipeline.process()
+		else:
+			results, iterCount, _ = graph.process()
+		processTime = default_timer()-startTime
+		if profiler and not warmup:
+			profiler.disable()
+		
+		if warmup:
+			continue
+		prepareTimes.append(prepareTime)
+		processTimes.append(processTime)
+		if ndjson:
+			# stream each run
+			writeJson(stream, {'run': run-args.warmup, 'results': results, 
+				'iterations': iterCount, 'prepare': prepareTime, 'process': processTime})
+	
+	timings = {'load': loadTime, 'prepare': timeStats(prepareTimes), 
+		'process': timeStats(processTimes), 'runs': args.repeat, 'warmup': args.warmup}
+	if ndjson:
+		writeJson(stream, {'timings': timings})
+	else:
+		writeJson(stream, {'results': results if args.repeat else None, 
+			'iterations': iterCount if args.repeat else None, 'timings': timings}, 4)
+	
+	if profiler:
+		import pstats
+		pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(25)
+
+
+def sweepGraph(args, stream=sys.stdout):
+	'''
+	Processes a graph for all combinations of the values 
+	specified by the command line arguments
+
+	:param args: parsed arguments of the "sweep" command
+	:param stream: where to write the output to
+	'''
+	graph = Graph(args.graph)
+	if args.defaults:
+		graph.setDefaults(dict(args.defaults))
+	if args.points:
+		with open(args.points) as file:
+			params = [json.loads(line) for line in file if line.strip()]
+	else:
+		params = {}
+		for key, values in args.grid or []:
+			if not isinstance(values, list):
+				raise argparse.ArgumentTypeError('Values of {} must be a JSON list'.format(key))
+			params[key] = values
+	
+	startTime = default_timer()
+	count = 0
+	for index, point, results in graph.sweep(params, args.workers, args.checkpoint):
+		writeJson(stream, {'index': index, 'point': point, 'results': results})
+		count += 1
+	duration = default_timer()-startTime
+	writeJson(stream, {'timings': {'points': count, 'total': duration, 
+		'workers': args.workers}})
+
+
+def serveGraphs(args):
+	'''
+	Serves graph files until interrupted
+
+	:param args: parsed arguments of the "serve" command
+	'''
+	from . import server # only when needed
+	graphs = dict((server.graphName(path), path) for path in args.graphs)
+	graphServer = server.GraphServer(graphs, args.host, args.port, args.instances)
+	for name in sorted(graphs):
+		print('Serving {} at {}/graphs/{}'.format(graphs[name], graphServer.url, name), 
+			file=sys.stderr)
+	try:
+		graphServer.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		graphServer.server_close()
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(prog='python -m flow', 
+		description='Runs flow graphs without the GUI')
+	commands = parser.add_subparsers(dest='command')
+	commands.required = True
+	# options of all commands, so they can be given after the command
+	common = argparse.ArgumentParser(add_help=False)
+	common.add_argument('--log', default='WARNING', 
+		help='log level, e.g. INFO or DEBUG (default: WARNING)')
+	
+	runParser = commands.add_parser('run', parents=[common], help='process a graph file')
+	runParser.add_argument('graph', help='JSON formatted graph file')
+	runParser.add_argument('--set', dest='defaults', action='append', type=parseDefault, 
+		metavar='NODE.INPUT=VALUE', help='override an input default value, '
+		'the value is parsed as JSON or else taken as string (repeatable)')
+	runParser.add_argument('-n', '--repeat', type=int, default=1, 
+		help='number of measured runs (default: 1)')
+	runParser.add_argument('-w', '--warmup', type=int, default=0, 
+		help='number of unmeasured runs before (default: 0)')
+	runParser.add_argument('--stream', action='store_true', 
+		help='write every value of unconnected outputs as JSON line while processing, implies --format ndjson')
+	runParser.add_argument('-s', '--stages', type=int, default=1, 
+		help='process in this many pipeline stages, each in its own thread (default: 1)')
+	runParser.add_argument('--profile', action='store_true', 
+		help='profile the measured runs and print the statistics to stderr')
+	runParser.add_argument('-f', '--format', choices=('json', 'ndjson'), default='json', 
+		help='json: one document at the end, ndjson: one line per run (default: json)')
+	sweepParser = commands.add_parser('sweep', parents=[common], 
+		help='process a graph file for many input defaults, one JSON line per point')
+	sweepParser.add_argument('graph', help='JSON formatted graph file')
+	sweepParser.add_argument('--grid', action='append', type=parseDefault, 
+		metavar='NODE.INPUT=[VALUES]', help='JSON list of default values for an input, '
+		'all combinations with the other grid inputs are run (repeatable)')
+	sweepParser.add_argument('--points', metavar='FILE', 
+		help='run the points from a file with one JSON object like '
+		'{"node.input": value, ...} per line instead of a grid')
+	sweepParser.add_argument('--set', dest='defaults', action='append', type=parseDefault, 
+		metavar='NODE.INPUT=VALUE', help='override an input default value for all points')
+	sweepParser.add_argument('-j', '--workers', type=int, default=1, 
+		help='number of worker processes (default: 1)')
+	sweepParser.add_argument('--checkpoint', metavar='FILE', 
+		help='file to store finished points, to resume an interrupted sweep')
+	serveParser = commands.add_parser('serve', parents=[common], 
+		help='serve graph files on a local HTTP server')
+	serveParser.add_argument('graphs', nargs='+', 
+		help='JSON formatted graph files, served by their file name without suffix')
+	serveParser.add_argument('--host', default='127.0.0.1', 
+		help='address to bind to (default: 127.0.0.1)')
+	serveParser.add_argument('-p', '--port', type=int, default=8080, 
+		help='port to listen on (default: 8080)')
+	serveParser.add_argument('-i', '--instances', type=int, default=2, 
+		help='number of preloaded graph copies per graph (default: 2)')
+	
+	loadParser = commands.add_parser('loadtest', parents=[common], 
+		help='send requests to a served graph and report the latency percentiles')
+	loadParser.add_argument('url', help='graph url, e.g. http://127.0.0.1:8080/graphs/loop')
+	loadParser.add_argument('--set', dest='defaults', action='append', type=parseDefault, 
+		metavar='NODE.INPUT=VALUE', help='input default value sent with every request')
+	loadParser.add_argument('-n', '--requests', type=int, default=1000, 
+		help='total number of requests (default: 1000)')
+	loadParser.add_argument('-c', '--concurrency', type=int, default=8, 
+		help='number of clients sending at the same time (default: 8)')
+	
+	args = parser.parse_args(argv)
+	logging.basicConfig(level=getattr(logging, args.log.upper()))
+	try:
+		if args.command == 'run':
+			runGraph(args)
+		elif args.command == 'sweep':
+			sweepGraph(args)
+		elif args.command == 'serve':
+			serveGraphs(args)
+		elif args.command == 'loadtest':
+			from .server import loadTest # only when needed
+			writeJson(sys.stdout, loadTest(args.url, dict(args.defaults or []), 
+				args.requests, args.concurrency), 4)
+	except UnknownInputError as e:
+		parser.error(e.args[0])
+	except argparse.ArgumentTypeError as e:
+		parser.error(str(e))
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
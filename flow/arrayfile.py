@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Binary array files, either NumPy .npy files or raw data without header.
+With NumPy installed, files are read as numpy.memmap without copying,
+else as array.array.
+'''
+from __future__ import nested_scopes, generators, with_statement, unicode_literals, absolute_import, division, print_function
+
+import ast # for parsing .npy headers
+import struct # for the .npy header length
+import sys # for the native byte order
+import array as typedarray # for arrays without NumPy
+try:
+	import numpy # for memory mapped arrays
+except ImportError:
+	numpy = None
+
+MAGIC = b'\x93NUMPY'
+HEADER_SIZE = 128 # bytes, so the shape can grow without moving the data
+NATIVE = '<' if sys.byteorder == 'little' else '>'
+# NumPy type names for raw files without NumPy
+TYPE_NAMES = {'float64': 'f8', 'float32': 'f4', 'int64': 'i8', 'int32': 'i4', 'int16': 'i2',
+	'int8': 'i1', 'uint64': 'u8', 'uint32': 'u4', 'uint16': 'u2', 'uint8': 'u1', 'bool': 'b1'}
+
+def isNpy(filepath):
+	return filepath.lower().endswith('.npy')
+
+
+def typeCode(descr):
+	'''
+	:param descr: NumPy type string like "<f8"
+	:returns: array.array typecode like "d"
+	'''
+	kind, size = descr[1], int(descr[2:])
+	if kind == 'f':
+		codes = 'fd'
+	elif kind == 'i':
+		codes = 'bhilq'
+	elif kind in 'ub':
+		codes = 'BHILQ'
+	else:
+		raise TypeError('No array type for {}'.format(descr))
+	for code in codes:
+		if typedarray.array(code).itemsize == size:
+			return code
+	raise TypeError('No array type for {}'.format(descr))
+
+
+def listShape(block):
+	'''
+	:param block: list of numbers, or of lists of numbers with the same shape
+	:returns: shape like of a NumPy array of the block
+	'''
+	if not isinstance(block, (list, tuple)):
+		return ()
+	shapes = set(listShape(row) for row in block)
+	if len(shapes) > 1:
+		raise ValueError('Rows of different shapes {} cannot be written as array'.format(
+			', '.join(str(shape) for shape in sorted(shapes))))
+	return (len(block),)+(shapes.pop() if shapes else ())
+
+
+def flatten(block):
+	'''
+	:returns: list of the numbers in nested lists, row by row
+	'''
+	if block and isinstance(block[0], (list, tuple)):
+		return [value for row in block for value in flatten(row)]
+	return block
+
+
+def descrOf(block):
+	'''
+	:param block: NumPy array, array.array or list of numbers or of lists of numbers
+	:returns: NumPy type string like "<f8" and the shape of the rows
+	'''
+	if numpy is not None and isinstance(block, numpy.ndarray):
+		return block.dtype.str, block.shape[1:]
+	if isinstance(block, typedarray.array):
+		code = block.typecode
+		kind = 'f' if code in 'fd' else 'u' if code.isupper() else 'i'
+		return '{}{}{}'.format('|' if block.itemsize == 1 else NATIVE, kind, block.itemsize), ()
+	rowShape = listShape(block)[1:]
+	if all(isinstance(value, int) for value in flatten(block)):
+		return NATIVE+'i8', rowShape
+	return NATIVE+'f8', rowShape
+
+
+def dtypeDescr(dtype):
+	'''
+	:param dtype: NumPy type name like "float64"
+	:returns: NumPy type string like "<f8"
+	'''
+	if numpy is not None:
+		return numpy.dtype(dtype).str
+	if dtype not in TYPE_NAMES:
+		raise TypeError('Unknown type {}, use one of {}'.format(dtype, ', '.join(sorted(TYPE_NAMES))))
+	code = TYPE_NAMES[dtype]
+	return ('|' if code[1] == '1' else NATIVE)+code
+
+
+def toBytes(block, descr):
+	'''
+	:returns: the data of the block as bytes of the type
+	'''
+	if numpy is not None:
+		return numpy.ascontiguousarray(block, dtype=descr).tobytes()
+	arr = block
+	if not isinstance(arr, typedarray.array) or descrOf(arr)[0] != descr:
+		arr = typedarray.array(typeCode(descr), flatten(block))
+	if descr[0] not in (NATIVE, '|'):
+		arr = typedarray.array(arr.typecode, arr)
+		arr.byteswap()
+	return arr.tobytes() if hasattr(arr, 'tobytes') else arr.tostring()
+
+
+def fromBytes(data, descr):
+	'''
+	:returns: array.array from bytes of the type
+	'''
+	arr = typedarray.array(typeCode(descr))
+	if hasattr(arr, 'frombytes'):
+		arr.frombytes(data)
+	else:
+		arr.fromstring(data)
+	if descr[0] not in (NATIVE, '|'):
+		arr.byteswap()
+	return arr
+
+
+def headerText(descr, shape):
+	return "{{'descr': '{}', 'fortran_order': False, 'shape': {}, }}".format(descr, tuple(shape))
+
+
+def headerSize(descr, shape):
+	'''
+	:returns: size in bytes of a .npy version 1.0 header which fits the shape,
+		at least HEADER_SIZE and aligned to 64 bytes like numpy does
+	'''
+	size = len(MAGIC)+4+len(headerText(descr, shape))+1
+	return max(HEADER_SIZE, (size+63)//64*64)
+
+
+def moveData(file, size, newSize, blockSize=1 << 20):
+	'''
+	Moves the data after the header towards the end of the file, 
+	so a header of newSize bytes fits before it
+
+	:param size: current header size in bytes
+	'''
+	file.seek(0, 2)
+	end = file.tell()
+	# from the end, so no data is overwritten before it was moved
+	while end > size:
+		start = max(size, end-blockSize)
+		file.seek(start)
+		block = file.read(end-start)
+		file.seek(start+newSize-size)
+		file.write(block)
+		end = start
+
+
+def writeHeader(file, descr, shape, size=HEADER_SIZE):
+	'''
+	Writes a .npy version 1.0 header at the beginning of the file
+
+	:param size: total header size in bytes, the data starts after it
+	'''
+	header = headerText(descr, shape)
+	length = size-len(MAGIC)-4
+	if len(header)+1 > length:
+		raise ValueError('Shape {} does not fit into the .npy header'.format(shape))
+	file.seek(0)
+	file.write(MAGIC+b'\x01\x00'+struct.pack('<H', length))
+	file.write((header.ljust(length-1)+'\n').encode('latin1'))
+
+
+def readHeader(file):
+	'''
+	Reads the header of a .npy file
+
+	:returns: type string like "<f8", shape, fortran order and header size in bytes
+	'''
+	file.seek(0)
+	if file.read(len(MAGIC)) != MAGIC:
+		raise ValueError('{} is no .npy file'.format(file.name))
+	major = ord(file.read(2)[:1])
+	if major == 1:
+		length = struct.unpack('<H', file.read(2))[0]
+		size = len(MAGIC)+4+length
+	else:
+		length = struct.unpack('<I', file.read(4))[0]
+		size = len(MAGIC)+6+length
+	header = ast.literal_eval(file.read(length).decode('latin1'))
+	return header['descr'], tuple(header['shape']), header['fortran_order'], size
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Reading and writing compressed text files like plain ones.
+Compressed files are detected by their first bytes when reading
+and by their suffix when writing: .gz, .bz2, .xz and .zst (with zstandard installed).
+'''
+from __future__ import nested_scopes, generators, with_statement, unicode_literals, absolute_import, division, print_function
+
+import io # for text access to compressed files
+import threading # for reading ahead
+from itertools import islice # for reading blocks of lines
+import gzip # for .gz files
+import bz2 # for .bz2 files
+try:
+	import lzma # for .xz files
+except ImportError:
+	# for python 2
+	lzma = None
+try:
+	import zstandard # for .zst files
+except ImportError:
+	zstandard = None
+try:
+	# for python 2
+	from Queue import Queue, Full
+except ImportError:
+	# for python 3
+	from queue import Queue, Full
+
+SUFFIXES = {'.gz': 'gz', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zst'}
+MAGIC = ((b'\x1f\x8b', 'gz'), (b'BZh', 'bz2'), (b'\xfd7zXZ\x00', 'xz'), (b'\x28\xb5\x2f\xfd', 'zst'))
+
+def codecOf(filepath, detect=True):
+	'''
+	:param detect: look at the first bytes of the file, else only at the suffix
+	:returns: "gz", "bz2", "xz", "zst" or None for uncompressed files
+	'''
+	if detect:
+		try:
+			with open(filepath, 'rb') as file:
+				start = file.read(6)
+		except (IOError, OSError):
+			start = b''
+		for magic, codec in MAGIC:
+			if start.startswith(magic):
+				return codec
+		if start:
+			return None
+	for suffix, codec in SUFFIXES.items():
+		if filepath.lower().endswith(suffix):
+			return codec
+	return None
+
+
+def openBinary(filepath, codec, mode, level=-1):
+	'''
+	:param mode: "rb", "wb" or "ab"
+	:param level: compression level for writing, -1 for the default of the codec
+	:returns: binary file object which compresses or decompresses
+	'''
+	writing = mode[0] != 'r'
+	kwargs = {}
+	if codec == 'gz':
+		if writing and level >= 0:
+			kwargs['compresslevel'] = level
+		return gzip.open(filepath, mode, **kwargs)
+	if codec == 'bz2':
+		if writing and level >= 0:
+			kwargs['compresslevel'] = max(1, level)
+		return bz2.BZ2File(filepath, mode, **kwargs)
+	if codec == 'xz':
+		if lzma is None:
+			raise ImportError('Reading and writing .xz files needs python 3')
+		if writing and level >= 0:
+			kwargs['preset'] = level
+		return lzma.open(filepath, mode, **kwargs)
+	if codec == 'zst':
+		if zstandard is None:
+			raise ImportError('Reading and writing .zst files needs the zstandard package')
+		if writing:
+			kwargs['cctx'] = zstandard.ZstdCompressor(level=level if level >= 0 else 3)
+		return zstandard.open(filepath, mode, **kwargs)
+	raise ValueError('Unknown compression {}'.format(codec))
+
+
+def openFile(filepath, mode='r', level=-1):
+	'''
+	Opens a text file, which is compressed or decompressed on the fly
+	if it is a compressed file
+
+	:param mode: "r", "w" or "a"
+	:param level: compression level for writing, -1 for the default of the codec
+	:returns: file object
+	'''
+	codec = codecOf(filepath, detect=mode == 'r')
+	if codec is None:
+		return open(filepath, mode)
+	return io.TextIOWrapper(openBinary(filepath, codec, mode+'b', level))
+
+
+class ReadAhead(object):
+	'''
+	Reads lines from a file in another thread,
+	so e.g. decompressing overlaps with processing the lines.
+	Iterating over it gives the lines
+	'''
+	def __init__(self, file, blockSize=1000, numBlocks=8):
+		'''
+		:param file: file object opened for reading
+		:param blockSize: number of lines read at once
+		:param numBlocks: maximum number of blocks read ahead
+		'''
+		self.file = file
+		self.queue = Queue(numBlocks)
+		self.stop = threading.Event()
+		self.thread = threading.Thread(target=self.read, args=(blockSize,))
+		self.thread.daemon = True
+		self.thread.start()
+	
+	def read(self, blockSize):
+		try:
+			while not self.stop.is_set():
+				lines = list(islice(self.file, blockSize))
+				self.put(lines)
+				if not lines:
+					return
+		except Exception as e:
+			self.put(e) # raised when iterating
+	
+	def put(self, item):
+		# waits while the queue is full, unless closed
+		while not self.stop.is_set():
+			try:
+				self.queue.put(item, timeout=0.1)
+				return
+			except Full:
+				pass
+	
+	def blocks(self):
+		'''
+		:returns: generator of the lists of lines
+		'''
+		while True:
+			lines = self.queue.get()
+			if isinstance(lines, Exception):
+				raise lines
+			if not lines:
+				return
+			yield lines
+	
+	def __iter__(self):
+		for lines in self.blocks():
+			for line in lines:
+				yield line
+	
+	def close(self):
+		'''
+		Stops reading, must be called before closing the file
+		'''
+		self.stop.set()
+		self.thread.join()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Fusing chains of elementwise nodes, e.g. Mul -> Add -> Exp -> Log,
+into one step which evaluates the composed formula per data item.
+The nodes and connections of the graph stay unchanged,
+only the graph processes the chain as one step.
+'''
+from __future__ import nested_scopes, generators, with_statement, unicode_literals, absolute_import, division, print_function
+
+import math # for the formulas on single values
+import logging # for reporting fused chains
+try:
+	import numpy # for the formulas on arrays
+except ImportError:
+	numpy = None
+
+log = logging.getLogger(__name__)
+
+# names which can be used in node formulas, for single values and for arrays
+FUNCTIONS = ('exp', 'log', 'sin', 'cos', 'tan', 'sinh', 'cosh', 'tanh',
+	'asin', 'acos', 'atan', 'asinh', 'acosh', 'atanh', 'radians', 'degrees')
+SCALAR_NAMES = dict((name, getattr(math, name)) for name in FUNCTIONS)
+# numpy names the inverse functions e.g. "arcsin" instead of "asin"
+VECTOR_NAMES = dict((name, getattr(numpy, 'arc'+name[1:] if name.startswith('a') else name))
+	for name in FUNCTIONS) if numpy else None
+
+_compiled = {} # formula: code, as the same chains are prepared again and again
+MAX_COMPILED = 256 # maximum number of cached formulas, e.g. when defaults change in each run
+
+class FusedChain(object):
+	'''
+	Processes a chain of nodes in one step by evaluating their composed formula
+	'''
+	def __init__(self, nodes, inputs):
+		'''
+		:param nodes: nodes in chain order, each only connected to the next one
+		:param inputs: the connected input of each node
+		'''
+		self.nodes = nodes
+		self.input = inputs[0]
+		self.output = list(nodes[-1].outputs)[0]
+		self.name = ' > '.join(node.name for node in nodes)
+		# compose the formula, with the default values as constants
+		constants = {}
+		formula = 'x'
+		for node, connected in zip(nodes, inputs):
+			args = {}
+			for inp in node.inputs:
+				if inp is connected:
+					args[inp.name] = formula
+				else:
+					args[inp.name] = 'k{}'.format(len(constants))
+					constants[args[inp.name]] = inp.default
+			formula = node.expression(args)
+		self.formula = formula
+		code = _compiled.get(formula)
+		if code is None:
+			if len(_compiled) >= MAX_COMPILED:
+				_compiled.pop(next(iter(_compiled))) # the oldest one in python 3
+			# without the future division of this module, so e.g. "/" is the same as in the nodes
+			code = _compiled[formula] = compile('lambda x: '+formula, '<fused>', 'eval', 0, True)
+		self.scalarFunc = eval(code, dict(SCALAR_NAMES, **constants))
+		self.vectorFunc = eval(code, dict(VECTOR_NAMES, **constants)) if numpy else None
+	
+	def collect(self):
+		'''
+		Is called instead of the "collect" method of all nodes in the chain
+		'''
+		busy = True if self.input.buffer else False
+		for node in self.nodes:
+			node.busy = busy
+		if busy:
+			x = self.input.pull()
+			if numpy and isinstance(x, numpy.ndarray):
+				self.output.push(self.vectorFunc(x))
+			else:
+				self.output.push(self.scalarFunc(x))
+
+
+def fuseChains(runOrder, loopNodes=()):
+	'''
+	Finds chains of at least 2 fusible nodes, i.e. nodes with a formula,
+	1 output and only 1 connected input, where each output only goes
+	to the next node in the chain
+
+	:param runOrder: nodes to search in, in run order
+	:param loopNodes: nodes in loops, which are not fused
+	:returns: dictionary with the last node of each chain: FusedChain, 
+		which must be processed at the place of that node in the run order
+	'''
+	fusible = {} # node: its connected input
+	for node in runOrder:
+		if node in loopNodes or len(node.output) != 1:
+			continue
+		connected = [inp for inp in node.inputs if inp.isConnected()]
+		if len(connected) != 1 or any(inp.default is None
+				for inp in node.inputs if inp is not connected[0]):
+			continue
+		args = dict((inp.name, inp.name) for inp in node.inputs)
+		# not for subclasses which process otherwise than the formula says
+		if node.declares('formula', 'expression') and node.expression(args) is not None:
+			fusible[node] = connected[0]
+	
+	chains = {}
+	for node in runOrder:
+		if node not in fusible:
+			continue
+		prevNode = fusible[node].connOutput.node
+		if prevNode in fusible and len(list(prevNode.outputs)[0].connInputs) == 1:
+			continue # not the first node of a chain
+		nodes = [node]
+		while True:
+			connInputs = list(nodes[-1].outputs)[0].connInputs
+			if len(connInputs) != 1 or connInputs[0].node not in fusible:
+				break
+			nodes.append(connInputs[0].node)
+		if len(nodes) > 1:
+			chain = FusedChain(nodes, [fusible[n] for n in nodes])
+			log.info('Fused {}: {}'.format(chain.name, chain.formula))
+			chains[nodes[-1]] = chain
+	return chains
@@ -4,6 +4,13 @@ import logging # for debugging the dataflow
 import importlib, inspect # for instantiating nodes from class path
 import sys # for adding package to path
 import os.path as putil # for path utility
+import threading # for observing the graph from other threads
+import itertools # for parameter grids of sweeps
+import multiprocessing # for running sweeps in parallel
+import copy # for not sharing default values between sweep points
+from collections import deque # for streaming results
+from .fusion import fuseChains # for processing chains of operations in one step
+from .loops import findLoopRegions, LoopRegion # for processing loops in one step
 
 log = logging.getLogger(__name__)
 
@@ -28,19 +35,122 @@ def uniqueName(names, name):
 	:param name: name which needs to be different from the names in the list
 	:returns: (modified) unique name
 	'''
-	# check if name is already unique
-	if not any(n == name for n in names):
-		return name
-	else:
-		if '.' in name:
-			# we already tried to make unique
-			pre, suf = name.split('.')
-			# increase suffix and try again
-			newName = '{}.{}'.format(pre, int(suf)+1)
+	while name in names:
+		pre, sep, suf = name.rpartition('.')
+		if sep and suf.isdigit():
+			# we already tried to make unique, increase suffix and try again
+			name = '{}.{}'.format(pre, int(suf)+1)
 		else:
 			# append number as suffix
-			newName = '{}.{}'.format(name, 1)
-		return uniqueName(names, newName)
+			name = '{}.{}'.format(name, 1)
+	return name
+
+def inputState(nodes):
+	'''
+	:param nodes: nodes to describe
+	:returns: comparable list with the connections and 
+		input default values of the nodes, sorted by node name
+	'''
+	return sorted(((node.name, node, [(inp.name, inp.connOutput, inp.default) 
+		for inp in node.inputs]) for node in nodes), key=lambda item: item[0])
+
+def connectionState(nodes):
+	'''
+	:param nodes: nodes to describe
+	:returns: comparable list with the connections of the nodes 
+		and which of their inputs have no default value
+	'''
+	return [(node, [(inp.connOutput, inp.default is None) for inp in node.inputs]) 
+		for node in nodes]
+
+def copyState(state):
+	'''
+	:param state: list from inputState
+	:returns: the state with copied default values, as they may be changed in place
+	'''
+	return [(name, node, [(inpName, connOutput, copy.deepcopy(default)) 
+		for inpName, connOutput, default in inputs]) for name, node, inputs in state]
+
+def sameState(state, otherState):
+	'''
+	:returns: True when both lists from inputState are equal
+	'''
+	try:
+		return state == otherState
+	except Exception:
+		return False # e.g. defaults which cannot be compared as a whole
+
+def checkpointLine(entry):
+	'''
+	:param entry: dictionary of a finished sweep point
+	:returns: the entry as JSON, or None when it would not be read back the same
+	'''
+	try:
+		line = json.dumps(entry)
+		return line if sameState(json.loads(line), entry) else None
+	except (TypeError, ValueError):
+		return None
+
+
+class UnknownInputError(KeyError):
+	'''
+	Raised for a "nodeName.inputName" key which is not in the graph, 
+	so it can be told apart from KeyErrors raised while processing
+	'''
+
+
+class Monitor(object):
+	'''
+	Thread-safe channel to observe a processing graph from another thread.
+	The graph publishes snapshots of its results and statistics, 
+	but at most once per interval, so fast graphs are not slowed down.
+	Only the latest snapshot is kept.
+	'''
+	def __init__(self, interval=0.1):
+		'''
+		:param interval: minimum time in seconds between two snapshots
+		'''
+		self.interval = interval
+		self.lock = threading.Lock()
+		self.snapshot = None
+		self.lastPublish = 0.
+	
+	def publish(self, graph, iterCount, iterTime, finished=False, error=None):
+		'''
+		Takes a snapshot of the graph when the interval has passed. 
+		Is called from the processing thread.
+
+		:param graph: the processing graph
+		:param iterCount: number of iterations so far
+		:param iterTime: processing time so far
+		:param finished: True for the final snapshot, which is never skipped
+		:param error: the exception when processing failed, with the final snapshot
+		'''
+		now = default_timer()
+		if not finished and now-self.lastPublish < self.interval:
+			return
+		self.lastPublish = now
+		# convert results here, as they may change after releasing them
+		results = {}
+		for node in graph.nodes:
+			for out in node.outputs:
+				results[(node.name, out.name)] = shortString(out.result)
+		snapshot = {'results': results, 'iterations': iterCount, 'time': iterTime, 
+			'finished': finished, 'error': '{}: {}'.format(type(error).__name__, error) if error else None}
+		with self.lock:
+			self.snapshot = snapshot
+	
+	def fetch(self):
+		'''
+		:returns: latest snapshot dictionary with the shortened "results" 
+			per (node name, output name), "iterations", "time", "finished" 
+			and "error" (the message when processing failed, else None), 
+			or None when nothing new was published since the last fetch
+		'''
+		with self.lock:
+			snapshot = self.snapshot
+			self.snapshot = None
+		return snapshot
 
 
 class Graph(object):
@@ -54,9 +164,24 @@ class Graph(object):
 			builds the graph from the file
 		'''
 		self.nodeDict = {} # create dictionary for the nodes
+		self.nodePkgs = [] # paths of imported external node packages
 		self.nodesRunOrder = None
 		self.loopInputs = None
 		self.prepared = False
+		self.evalCache = {} # output: (state of the nodes it depends on, value)
+		self.foldConstants = True # replay nodes which only depend on defaults
+		self.fuseOperations = True # process chains of elementwise nodes in one step
+		self.innerLoops = True # process loops until settled in one step
+		self.loopLimit = 1000 # default maximum inner iterations of a loop per graph iteration
+		self.loopOptions = {} # node name: options for the LoopRegion the node is in
+		self.loopRegions = [] # LoopRegion list of the last preparation
+		self.layout = None # (connection state, run order, loop regions, loop inputs, looped inputs)
+		self.folded = None # (state of the folded nodes, {node: FoldedNode})
+		self.unfoldable = set() # nodes which pushed too much data for recording
+		self.runSteps = [] # (node, collect method) in run order
+		# metrics of the last processing
+		self.iterCount = 0
+		self.iterTime = 0.
 		# optionally build graph from file
 		if path:
 			self.fromFile(path)
@@ -64,6 +189,13 @@ class Graph(object):
 	def __del__(self):
 		self.clear() # delete all nodes before deleting the graph
 	
+	def clone(self):
+		'''
+		:returns: independent copy of the graph with the same nodes, 
+			connections and default values
+		'''
+		return GraphTemplate(self).instantiate()
+	
 	def __str__(self):
 		'''
 		Shows the current nodes and their connections as string
@@ -120,14 +252,27 @@ class Graph(object):
 
 		:param name: nodes graph name to remove
 		'''
-		self.nodeDict[name].disconnect()
-		self.nodeDict.pop(name)
+		node = self.nodeDict.pop(name)
+		node.disconnect()
+		for out in node.outputs:
+			self.evalCache.pop(out, None)
+		self.unfoldable.discard(node)
 	
 	def clear(self):
 		'''
 		Deletes all nodes in the graph
 		'''
+		# detach all connections at once, so no node keeps others alive
+		for node in self.nodes:
+			for inp in node.inputs:
+				inp.connOutput = None
+			for out in node.outputs:
+				out.connInputs = []
 		self.nodeDict.clear()
+		self.evalCache.clear()
+		self.folded = None
+		self.unfoldable.clear()
+		self.layout = None
 		# clean up properties from prepare
 		self.nodesRunOrder = None
 		self.loopInputs = None
@@ -144,6 +289,8 @@ class Graph(object):
 		'''
 		def importPkg(pkgPath):
 			# imports a package by directory path
+			if pkgPath not in self.nodePkgs:
+				self.nodePkgs.append(pkgPath) # remember for toDict
 			sys.path.append(putil.dirname(pkgPath))
 			pkg = importlib.import_module(putil.basename(pkgPath))
 			return pkg
@@ -169,13 +316,12 @@ class Graph(object):
 		clsName = classPath[sep+1:] # class name
 		# instantiate node
 		mod = importlib.import_module(modName)
-		modMems = inspect.getmembers(mod)
-		for mem in modMems:
-			if mem[0] == clsName:
-				node = mem[1]()
-				if name: # optional rename node
-					node.name = name
-				return node
+		nodeClass = getattr(mod, clsName, None)
+		if inspect.isclass(nodeClass):
+			node = nodeClass()
+			if name: # optional rename node
+				node.name = name
+			return node
 		
 		raise ImportError('Node {} cannot be found in {}'.format(clsName, modName))
 	
@@ -215,7 +361,12 @@ class Graph(object):
 		for nodeName, nodeEntry in graphDict['nodes'].items():
 			node = self.nodeDict[nodeName] # get the already created node
 			for inp in node.inputs:
-				inputEntry = nodeEntry['inputs'][inp.name]
+				inputEntry = nodeEntry['inputs'].get(inp.name)
+				if inputEntry is None:
+					# input was added to the node class after saving the file, keep its default
+					log.info('No setup for input "{}" of node "{}" in graph file'.format(
+						inp.name, nodeName))
+					continue
 				# set default
 				inp.default = inputEntry.get('default')
 				# set connection
@@ -225,6 +376,30 @@ class Graph(object):
 					connOutput = connNode.output[conn['output']]
 					inp.connect(connOutput)
 	
+	def toDict(self):
+		'''
+		:returns: dictionary describing nodes and connections 
+			in the same format as fromDict takes
+		'''
+		graphDict = {}
+		if self.nodePkgs:
+			graphDict['packages'] = list(self.nodePkgs)
+		nodeEntries = {}
+		graphDict['nodes'] = nodeEntries
+		for node in self.nodes:
+			inputEntries = {}
+			for inp in node.inputs:
+				inputEntries[inp.name] = {
+					'default': inp.default, 
+					'connection': None if not inp.isConnected() else {
+						'node': inp.connOutput.node.name, 
+						'output': inp.connOutput.name}}
+			nodeEntries[node.name] = {
+				'class': getattr(node, 'classPath', None) or '{}.{}'.format(
+					type(node).__module__, type(node).__name__), 
+				'inputs': inputEntries}
+		return graphDict
+	
 	def fromFile(self, path):
 		'''
 		Builds nodes and connections from json formatted file
@@ -238,6 +413,106 @@ class Graph(object):
 		file.close()
 		log.info('Built graph from file')
 	
+	def setDefaults(self, defaults):
+		'''
+		Overrides default values of inputs, e.g. to run the same graph 
+		with other parameters
+
+		:param defaults: dictionary like {"nodeName.inputName": value}
+		:returns: dictionary with the replaced default values, 
+			which can be passed again to restore them
+		'''
+		# look up all inputs first, so nothing is changed on errors
+		inputs = []
+		for key, value in defaults.items():
+			nodeName, _, inpName = key.rpartition('.')
+			node = self.nodeDict.get(nodeName)
+			if node is None:
+				raise UnknownInputError('No node {} in graph for {}'.format(nodeName, key))
+			if inpName not in node.input:
+				raise UnknownInputError('Node {} has no input {}'.format(nodeName, inpName))
+			inputs.append((key, node.input[inpName], value))
+		oldDefaults = {}
+		for key, inp, value in inputs:
+			oldDefaults[key] = inp.default
+			inp.default = value
+		self.prepared = False # nodes may need to prepare with new defaults
+		return oldDefaults
+	
+	def sweep(self, params, workers=1, checkpoint=None):
+		'''
+		Processes the graph for many combinations of input default values. 
+		The graph is sent once as dictionary to each worker process, 
+		which then only applies the defaults of each point and runs.
+		This graph itself is not changed.
+
+		:param params: either a dictionary like {"nodeName.inputName": [values]} 
+			to run all combinations of the values (grid), 
+			or an iterable of dictionaries like {"nodeName.inputName": value}
+		:param workers: number of worker processes, 
+			1 runs all points in this process
+		:param checkpoint: optional file path. Finished points are appended 
+			as JSON lines, and points already in the file are not run again, 
+			so an interrupted sweep can resume. Points whose point or results 
+			don't come back the same from JSON, e.g. tuples or NumPy arrays, 
+			are not stored and run again
+		:returns: generator of (index, point, results) for each point, 
+			with results like from getResults. Points from the checkpoint 
+			come first, then in order of finishing
+		'''
+		if isinstance(params, dict):
+			keys = list(params.keys())
+			points = (dict(zip(keys, values)) 
+				for values in itertools.product(*(params[k] for k in keys)))
+		else:
+			points = params
+		
+		# points done in an earlier, interrupted sweep
+		done = {}
+		if checkpoint and putil.exists(checkpoint):
+			with open(checkpoint) as file:
+				for line in file:
+					if line.strip():
+						entry = json.loads(line)
+						done[entry['index']] = entry
+		
+		def sweepPoints():
+			for index, point in enumerate(points):
+				entry = done.get(index)
+				if entry is None:
+					yield index, point
+				elif entry['point'] != json.loads(json.dumps(point, default=str)):
+					raise ValueError('Point {} of checkpoint {} does not belong to this sweep'.format(
+						index, checkpoint))
+		
+		for entry in sorted(done.values(), key=lambda e: e['index']):
+			yield entry['index'], entry['point'], entry['results']
+		
+		template = self.toDict()
+		pool = None
+		file = open(checkpoint, 'a') if checkpoint else None
+		try:
+			if workers > 1:
+				pool = multiprocessing.Pool(workers, _sweepInit, (template,))
+				finished = pool.imap_unordered(_sweepRun, sweepPoints())
+			else:
+				worker = SweepWorker(template)
+				finished = (worker.run(item) for item in sweepPoints())
+			for index, point, results in finished:
+				if file:
+					line = checkpointLine({'index': index, 'point': point, 'results': results})
+					if line:
+						file.write(line+'\n')
+						file.flush()
+					else:
+						log.info('Not storing point {} in the checkpoint, it has values which are no JSON types'.format(index))
+				yield index, point, results
+		finally:
+			if pool:
+				pool.terminate()
+			if file:
+				file.close()
+	
 	def getSources(self):
 		'''
 		:returns: list with the source nodes
@@ -252,32 +527,51 @@ class Graph(object):
 		return list(filter(lambda node: all(not out.isConnected() 
 			for out in node.outputs), self.nodes))
 	
-	def getRunOrder(self):
+	def getUpstream(self, node):
+		'''
+		:param node: node to start from
+		:returns: set of the node and all nodes it gets data from, directly or indirectly
+		'''
+		upstream = set([node])
+		pending = [node]
+		while pending:
+			for inp in pending.pop().inputs:
+				if inp.isConnected() and inp.connOutput.node not in upstream:
+					upstream.add(inp.connOutput.node)
+					pending.append(inp.connOutput.node)
+		return upstream
+	
+	def getRunOrder(self, nodes=None):
 		'''
+		:param nodes: optional part of the graph to order, 
+			which must contain all nodes its nodes get data from
 		:returns: list of nodes in a layer-wise execution order
 		'''		
+		nodes = list(self.nodes if nodes is None else nodes)
 		# get source nodes first
-		sourceNodes = self.getSources()
+		sourceNodes = [node for node in nodes 
+			if all(not inp.isConnected() for inp in node.inputs)]
 		if not sourceNodes:
 			# user has build a weird loop, try to solve
 			log.warning('No source node found for run order')
-			sinkNodes = self.getSinks()
 			iNode = 0
 			while True:
-				startNode = self.nodes[iNode]
+				startNode = nodes[iNode]
 				iNode += 1
-				if startNode not in sinkNodes:
+				if any(out.isConnected() for out in startNode.outputs):
 					sourceNodes = [startNode]
 					break
-				if iNode > len(self.nodes):
+				if iNode >= len(nodes):
 					log.error('Cannot solve run order. Using a suboptimal order.')
-					return self.nodes
+					return nodes
 		
 		orderedNodes = sourceNodes
+		known = set(nodes)
+		ordered = set(sourceNodes)
 		
 		# now go down the hierachy layer-wise until all nodes are in the list once
 		curLayer = sourceNodes
-		while len(orderedNodes) < len(self.nodes):
+		while len(orderedNodes) < len(nodes):
 			nextLayer = []
 			for node in curLayer:
 				# in each layer, get the next connected nodes
@@ -286,7 +580,8 @@ class Graph(object):
 						connNode = connInput.node
 						# if the node was unknown yet, append it to the order list
 						# also append it to the next layer
-						if connNode not in orderedNodes:
+						if connNode not in ordered and connNode in known:
+							ordered.add(connNode)
 							orderedNodes.append(connNode)
 							nextLayer.append(connNode)
 			# switch to next layer for next iteration
@@ -318,16 +613,17 @@ class Graph(object):
 		else:
 			return None
 	
-	def getLoops(self):
+	def getLoops(self, nodes=None):
 		'''
 		Checks for all loops in the graph.
 		Loops basically work, but there needs to be at least 
 		1 input with a default value in the loop
 		
+		:param nodes: optional part of the graph to check
 		:returns: list of loops (a loop is a list of inputs)
 		'''
 		loops = []
-		for nodeName, node in self.nodeDict.items():
+		for node in (self.nodes if nodes is None else nodes):
 			for inp in node.inputs:
 				if inp not in loops: # don't search within found loop again
 					loop = self.getInputLoop(inp)
@@ -343,7 +639,7 @@ class Graph(object):
 						if not hasDefault:
 							# loops can only work when a default value was given
 							raise ValueError('Loop detected, but no default value was assigned e.g. at {} of {}'.format(
-								inp.name, nodeName))
+								inp.name, node.name))
 		return loops
 	
 	def prepare(self):
@@ -352,66 +648,327 @@ class Graph(object):
 		This will get the optimal run order of node execution, 
 		check for loops in the graph and init the source buffers
 		'''		
-		# getting run order
-		self.nodesRunOrder = self.getRunOrder()		
-		log.info('Run order:')
-		for node in self.nodesRunOrder:
-			log.info('\t'+node.name)
-			# reset and prepare node in case it wants to prepare something
-			node.reset()
+		# the run order and the loops only change with the connections, 
+		# so they are kept e.g. when only the defaults change by processWith
+		connections = connectionState(self.nodes)
+		if self.layout is not None and self.layout[0] == connections:
+			_, self.nodesRunOrder, regions, self.loopInputs, looped = self.layout
+			for node in self.nodesRunOrder:
+				node.reset()
+			for inp in looped:
+				inp.looped = True
+		else:
+			# getting run order
+			self.nodesRunOrder = self.getRunOrder()		
+			log.info('Run order:')
+			for node in self.nodesRunOrder:
+				log.info('\t'+node.name)
+				# reset and prepare node in case it wants to prepare something
+				node.reset()
+			
+			# getting loops, which can only be within strongly connected regions
+			regions = findLoopRegions(self.nodesRunOrder)
+			self.loopInputs = self.getLoops([node for region in regions for node in region])
+			if self.loopInputs:
+				logging.warning('Loop detected. The graph may run forever')
+			self.layout = (connections, self.nodesRunOrder, regions, self.loopInputs, 
+				[inp for inp in self.loopInputs if inp.looped])
+		self.loopRegions = []
+		if self.innerLoops:
+			for region in regions:
+				options = {'maxIterations': self.loopLimit}
+				for node in region:
+					options.update(self.loopOptions.get(node.name, {}))
+				self.loopRegions.append(LoopRegion(region, **options))
+		inRegions = dict((region.nodes[0], region) for region in self.loopRegions)
+		inRegions.update((node, None) for region in self.loopRegions for node in region.nodes[1:])
 		
-		# getting loops
-		self.loopInputs = self.getLoops()
-		if self.loopInputs:
-			logging.warning('Loop detected. The graph may run forever')
+		# replace constant parts by what they pushed out before
+		folded = self.foldConstantNodes() if self.foldConstants else {}
+		# process chains of operations as one step at the place of their last node
+		fused = {}
+		if self.fuseOperations:
+			fused = fuseChains([node for node in self.nodesRunOrder if node not in folded], 
+				set(inp.node for inp in self.loopInputs))
+		inChains = set(node for chain in fused.values() for node in chain.nodes)
+		self.runSteps = []
+		for node in self.nodesRunOrder:
+			if node in inRegions:
+				# loops are processed as one step at the place of their first node
+				if inRegions[node]:
+					self.runSteps.append((node, inRegions[node].collect))
+			elif node in folded:
+				self.runSteps.append((node, folded[node].collect))
+			elif node in fused:
+				self.runSteps.append((node, fused[node].collect))
+			elif node not in inChains:
+				self.runSteps.append((node, node.collect))
 		
 		self.prepared = True
 	
-	def process(self, abort=None):
+	def foldConstantNodes(self):
+		'''
+		Finds the pure nodes which only depend on input default values, 
+		not on loops or other nodes. When their connections and defaults 
+		are the same as when preparing before, their pushed data is recorded 
+		in the next run and replayed in later runs instead of processing them
+
+		:returns: dictionary with node: FoldedNode
+		'''
+		loopNodes = set(inp.node for inp in self.loopInputs)
+		constant = set()
+		changed = True
+		while changed:
+			changed = False
+			for node in self.nodesRunOrder:
+				if node not in constant and node.isPure() and node not in loopNodes and \
+						node not in self.unfoldable and all(
+						not inp.isConnected() or inp.connOutput.node in constant 
+						for inp in node.inputs):
+					constant.add(node)
+					changed = True
+		if not constant:
+			self.folded = None
+			return {}
+		
+		state = inputState(constant)
+		if not self.folded or not sameState(self.folded[0], state):
+			# new defaults, e.g. from processWith in each run, are not worth recording yet
+			self.folded = (copyState(state), None)
+			return {}
+		if self.folded[1] is None:
+			log.info('Folding constant nodes: {}'.format(', '.join(name for name, _, _ in state)))
+			self.folded = (self.folded[0], dict((node, FoldedNode(node)) for node in constant))
+		foldedNodes = self.folded[1]
+		for folded in foldedNodes.values():
+			folded.prepare(constant)
+		return foldedNodes
+	
+	def startFolded(self):
+		'''
+		Starts recording the folded nodes, which did not record a complete run yet
+
+		:returns: the folded nodes
+		'''
+		foldedNodes = list(self.folded[1].values()) if self.folded and self.folded[1] else []
+		for folded in foldedNodes:
+			folded.start()
+		return foldedNodes
+	
+	def stopFolded(self, foldedNodes, finished):
+		'''
+		Stops recording the folded nodes after processing
+
+		:param foldedNodes: list from startFolded
+		:param finished: True when the run was complete
+		'''
+		# the pushed data of folded nodes can only be replayed when complete
+		for folded in foldedNodes:
+			folded.stop(finished)
+			if folded.disabled:
+				self.unfoldable.add(folded.node)
+				self.folded = None # find the constant nodes again without it
+	
+	def setLoopOptions(self, nodeName, maxIterations=None, tolerance=None, converged=None):
+		'''
+		Sets how the loop a node is in is processed, see LoopRegion.
+		Options which are None are not changed
+
+		:param nodeName: name of any node in the loop
+		:param maxIterations: maximum number of inner iterations per graph iteration
+		:param tolerance: maximum change of the values fed back to stop the loop
+		:param converged: function(values, lastValues) returning True to stop the loop
+		'''
+		if nodeName not in self.nodeDict:
+			raise KeyError('No node named {}'.format(nodeName))
+		options = self.loopOptions.setdefault(nodeName, {})
+		for key, value in (('maxIterations', maxIterations), ('tolerance', tolerance), 
+				('converged', converged)):
+			if value is not None:
+				options[key] = value
+		self.prepared = False
+	
+	def getLoopStats(self):
+		'''
+		:returns: list with a statistics dictionary per loop of the last processing
+		'''
+		return [region.stats() for region in self.loopRegions]
+	
+	def process(self, abort=None, monitor=None):
 		'''
 		Runs the "collect" method in each node in the run order 
 		until an abort condition is met
 
 		:param abort: object with an "is_set()" method, 
 			which must return True or False
+		:param monitor: optional Monitor to publish intermediate results to
 		:returns: result dictionary, number of iterations, iteration time
 		'''
-		log.debug(str(self))
+		for _ in self._steps(abort, monitor):
+			pass
+		# deliver results and performance metrics
+		results = self.getResults()
+		return results, self.iterCount, self.iterTime
+	
+	def stream(self, abort=None, history=None):
+		'''
+		Processes the graph like process, but yields the results while 
+		processing, i.e. every value pushed out of an unconnected output 
+		instead of only the last one
+
+		:param abort: see process
+		:param history: optional number of last values to keep per 
+			unconnected output, which are added to getResults as "history"
+		:returns: generator of (node, output, value)
+		'''
+		produced = deque()
+		outputs = [out for node in self.nodes for out in node.outputs 
+			if not out.isConnected()]
+		for out in outputs:
+			out.produced = produced
+			if history:
+				out.history = deque(maxlen=history)
+		steps = self._steps(abort)
+		try:
+			for _ in steps:
+				while produced:
+					yield produced.popleft()
+			# values pushed out while the nodes finish
+			while produced:
+				yield produced.popleft()
+		finally:
+			steps.close()
+			for out in outputs:
+				out.produced = None
+	
+	def _steps(self, abort=None, monitor=None):
+		'''
+		Runs the "collect" method in each node in the run order 
+		until an abort condition is met. Yields each node after collecting
+		'''
+		if log.isEnabledFor(logging.DEBUG):
+			log.debug(str(self))
 		if not self.prepared:
 			self.prepare() # prepare graph
 		
 		log.info('Graph processing...')
 		startTime = default_timer()
-		iterTime = 0.
-		iterCount = 0
-		while(True):
-			log.info('======== Iteration {} ========\n'.format(iterCount))
-			# collect and process data in each node
-			for node in self.nodesRunOrder:
-				node.collect()
-			
-			# abort conditions
-			if self.nothingToDo:
-				break
-			
-			if abort:
-				if abort.is_set():
+		self.iterTime = 0.
+		self.iterCount = 0
+		finished = False
+		error = None
+		foldedNodes = self.startFolded()
+		try:
+			while(True):
+				log.info('======== Iteration {} ========\n'.format(self.iterCount))
+				# collect and process data in each node
+				for node, collect in self.runSteps:
+					collect()
+					yield node
+				
+				# abort conditions
+				if self.nothingToDo:
+					finished = True
 					break
-			
-			# some metrics for performance analysis
-			iterTime = default_timer()-startTime
-			iterCount += 1
+				
+				if abort:
+					if abort.is_set():
+						break
+				
+				# some metrics for performance analysis
+				self.iterTime = default_timer()-startTime
+				self.iterCount += 1
+				
+				if monitor:
+					monitor.publish(self, self.iterCount, self.iterTime)
+		except Exception as e:
+			error = e
+			raise
+		finally:
+			# processing finished or stopped by the consumer
+			log.info('Finished. Took {:.3f} ms and {} iterations'.format(
+				self.iterTime*1e3, self.iterCount))
+			if log.isEnabledFor(logging.DEBUG):
+				log.debug(str(self))
+			self.prepared = False
+			self.stopFolded(foldedNodes, finished)
+			# notify the node in case it wants to clean up stuff
+			for node in self.nodes:
+				node.finish()
+			if monitor:
+				monitor.publish(self, self.iterCount, self.iterTime, True, error)
+	
+	def evaluate(self, output, abort=None):
+		'''
+		Processes only the nodes the output depends on, instead of the whole graph.
+		The value is cached and reused as long as the connections and 
+		input default values of these nodes are unchanged and all of them declare 
+		pure = True (see Node.isPure), otherwise they are processed in each call. 
+		Other outputs of these nodes get their results as in process.
+
+		:param output: output port of a node in this graph
+		:param abort: see process
+		:returns: the last value pushed out of the output
+		'''
+		nodes = self.getUpstream(output.node)
+		pure = all(node.isPure() for node in nodes)
+		if pure:
+			# what the value depends on, compared to the cached state
+			state = inputState(nodes)
+			if output in self.evalCache:
+				cachedState, value = self.evalCache[output]
+				if sameState(cachedState, state):
+					log.info('Using cached value of {}.{}'.format(output.node.name, output.name))
+					return value
 		
-		# processing finished
-		log.info('Finished. Took {:.3f} ms and {} iterations'.format(iterTime*1e3, iterCount))
-		log.debug(str(self))
-		self.prepared = False
-		# notify the node in case it wants to clean up stuff
-		for node in self.nodes:
-			node.finish()
-		# deliver results and performance metrics
-		results = self.getResults()
-		return results, iterCount, iterTime
+		runOrder = self.getRunOrder(nodes)
+		for node in runOrder:
+			node.reset()
+		self.getLoops(runOrder)
+		# pass data only within the evaluated nodes, and catch the value
+		capture = _Capture(output)
+		connections = []
+		for node in runOrder:
+			for out in node.outputs:
+				connInputs = [inp for inp in out.connInputs if inp.node in nodes]
+				if out is output and out.isConnected():
+					connInputs.insert(0, capture)
+				if len(connInputs) != len(out.connInputs) or out is output:
+					connections.append((out, out.connInputs))
+					out.connInputs = connInputs
+		try:
+			while True:
+				for node in runOrder:
+					node.collect()
+				if all(not node.busy for node in runOrder):
+					break
+				if abort and abort.is_set():
+					break
+		finally:
+			for out, connInputs in connections:
+				out.connInputs = connInputs
+			for node in runOrder:
+				node.finish()
+		value = capture.value if capture.captured else output.result
+		
+		if pure:
+			self.evalCache[output] = (copyState(state), value)
+		return value
+	
+	def processWith(self, defaults, abort=None):
+		'''
+		Processes the graph with temporarily overridden input default values
+
+		:param defaults: dictionary like {"nodeName.inputName": value}
+		:param abort: see process
+		:returns: result list like from getResults
+		'''
+		oldDefaults = self.setDefaults(defaults)
+		try:
+			results, _, _ = self.process(abort)
+		finally:
+			self.setDefaults(oldDefaults)
+		return results
 	
 	@property
 	def nothingToDo(self):
@@ -429,5 +986,208 @@ class Graph(object):
 		results = []
 		for sink in self.getSinks():
 			for out in sink.outputs:
-				results.append({'result': out.result, 'node': sink.name, 'output': out.name})
-		return results
\ No newline at end of file
+				result = {'result': out.result, 'node': sink.name, 'output': out.name}
+				if out.history is not None:
+					result['history'] = list(out.history)
+				results.append(result)
+		return results
+
+
+class _Capture(object):
+	'''
+	Stands in for a connected input to catch the values pushed by an output
+	'''
+	def __init__(self, output):
+		# what an output uses of its connected inputs
+		self.node = output.node
+		self.name = output.name
+		self.value = None
+		self.captured = False
+	
+	def put(self, data):
+		self.value = data
+		self.captured = True
+
+
+class FoldedNode(object):
+	'''
+	Records what a constant node pushes out in each iteration of a run 
+	and replays it in later runs instead of processing
+	'''
+	maxItems = 10000 # copying more data for each run is not faster than processing
+	
+	def __init__(self, node):
+		'''
+		:param node: node which only depends on input default values
+		'''
+		self.node = node
+		self.steps = [] # (busy, [(output, data)]) per iteration
+		self.complete = False
+		self.pushed = [] # (output, data) of the current iteration, see append
+		self.targets = {} # output: inputs of not folded nodes
+		self.iteration = 0
+		self.numItems = 0 # pushed data items and their elements recorded so far
+		self.disabled = False # True when the node pushed too much data for recording
+	
+	def prepare(self, folded):
+		'''
+		:param folded: set of all folded nodes, which get nothing replayed
+		'''
+		self.targets = dict((out, [inp for inp in out.connInputs if inp.node not in folded]) 
+			for out in self.node.outputs)
+		self.iteration = 0
+	
+	def start(self):
+		if not self.complete and not self.disabled:
+			self.steps = []
+			self.numItems = 0
+			for out in self.node.outputs:
+				out.recorded = self
+	
+	def stop(self, finished):
+		'''
+		:param finished: True when the run was complete, so the recording can be used
+		'''
+		if not self.complete and not self.disabled:
+			for out in self.node.outputs:
+				out.recorded = None
+			del self.pushed[:]
+			self.complete = finished
+	
+	def collect(self):
+		if self.complete:
+			self.replay()
+			return
+		self.node.collect()
+		if self.disabled:
+			return
+		# copy, as the receiving nodes may change the data
+		self.steps.append((self.node.busy, [(out, copy.deepcopy(data)) for out, data in self.pushed]))
+		del self.pushed[:]
+	
+	def append(self, item):
+		'''
+		Records an item (output, data) pushed by the node
+		'''
+		data = item[1]
+		# elements of lists, dictionaries, NumPy arrays etc., strings are not copied
+		sized = hasattr(data, '__len__') and not isinstance(data, (str, bytes, type(u'')))
+		self.numItems += 1+(len(data) if sized else 0)
+		if self.numItems > self.maxItems:
+			log.info('Not folding {}, it pushes too much data'.format(self.node.name))
+			self.disabled = True
+			self.steps = []
+			for out in self.node.outputs:
+				out.recorded = None
+			del self.pushed[:]
+			return
+		self.pushed.append(item)
+	
+	def replay(self):
+		if self.iteration < len(self.steps):
+			busy, pushed = self.steps[self.iteration]
+		else:
+			busy, pushed = False, []
+		self.iteration += 1
+		self.node.busy = busy
+		for out, data in pushed:
+			if out.isConnected():
+				for inp in self.targets[out]:
+					inp.put(copy.deepcopy(data))
+			else:
+				out.push(copy.deepcopy(data))
+
+
+class GraphTemplate(object):
+	'''
+	Structure of a graph to make independent copies of it quickly. 
+	The node classes are stored, so nothing needs to be imported or searched 
+	again, and the nodes are connected directly in linear time.
+	Like for graph files, the nodes must be constructible without arguments.
+	'''
+	def __init__(self, graph):
+		'''
+		:param graph: graph to take the nodes, connections, defaults 
+			and processing options from
+		'''
+		self.nodePkgs = list(graph.nodePkgs)
+		self.options = dict((key, getattr(graph, key)) for key in 
+			('foldConstants', 'fuseOperations', 'innerLoops', 'loopLimit'))
+		self.loopOptions = dict((name, dict(options)) 
+			for name, options in graph.loopOptions.items())
+		self.nodes = [] # (name, class, class path or None, {input: default})
+		self.conns = [] # (input node index, input, output node index, output)
+		nodeIndex = {}
+		outputKeys = {} # output ports may have been renamed after adding them
+		for iNode, node in enumerate(graph.nodes):
+			nodeIndex[node] = iNode
+			for key, out in node.output.items():
+				outputKeys[out] = key
+			# copied, so later changes of the graph's defaults don't change the template
+			self.nodes.append((node.name, type(node), getattr(node, 'classPath', None), 
+				dict((key, copy.deepcopy(inp.default)) for key, inp in node.input.items())))
+		for iNode, node in enumerate(graph.nodes):
+			for key, inp in node.input.items():
+				out = inp.connOutput
+				if out:
+					self.conns.append((iNode, key, nodeIndex[out.node], outputKeys[out]))
+	
+	def instantiate(self):
+		'''
+		:returns: new graph built from the template
+		'''
+		graph = Graph()
+		graph.nodePkgs = list(self.nodePkgs)
+		for key, value in self.options.items():
+			setattr(graph, key, value)
+		graph.loopOptions = dict((name, dict(options)) 
+			for name, options in self.loopOptions.items())
+		nodes = []
+		for name, nodeClass, classPath, defaults in self.nodes:
+			node = nodeClass()
+			node.name = name # names are already unique
+			if classPath:
+				node.classPath = classPath
+			for key, default in defaults.items():
+				# don't share mutable defaults like dicts between the graphs
+				node.input[key].default = copy.deepcopy(default)
+			graph.nodeDict[name] = node
+			nodes.append(node)
+		for iInNode, inKey, iOutNode, outKey in self.conns:
+			inp = nodes[iInNode].input[inKey]
+			out = nodes[iOutNode].output[outKey]
+			inp.connOutput = out
+			out.connInputs.append(inp)
+		return graph
+
+
+class SweepWorker(object):
+	'''
+	Processes points of a sweep on its own graph
+	'''
+	def __init__(self, template):
+		'''
+		:param template: graph dictionary like from Graph.toDict
+		'''
+		self.graph = Graph()
+		self.graph.fromDict(template)
+	
+	def run(self, item):
+		'''
+		:param item: tuple with point index and 
+			dictionary like {"nodeName.inputName": value}
+		:returns: tuple with point index, point and results
+		'''
+		index, point = item
+		results = self.graph.processWith(copy.deepcopy(point))
+		return index, point, results
+
+
+_sweepWorker = None # one per worker process
+
+def _sweepInit(template):
+	global _sweepWorker
+	_sweepWorker = SweepWorker(template)
+
+def _sweepRun(item):
+	return _sweepWorker.run(item)
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-from .graph import Graph, shortString # for building the flow graph
+from .graph import Graph, Monitor, shortString # for building the flow graph
 from .node import Ptype # for identifying port data types
 from . import nodes # the node database
 import os.path as putil # for path utility
@@ -10,6 +10,8 @@ import threading # for making graph processing non-blocking
 import inspect # for walking the node modules
 import importlib # for loading external node packages
 import sys # for relative importing
+from collections import deque # for buffering log records
+import re # for tokenizing node names in the search index
 try:
 	# for python 2
 	import Tkinter as tk # for building the gui
@@ -78,13 +80,23 @@ class NodeVisual(object):
 		self.node = node
 		node.visual = self
 		self.pos = pos
+		self.size = Point(0, 0) # last known pixel size of the body
+		self.scale = 1.0
 		self.fontSize = 12
 		self.font = tkFont.Font(family='Arial', size=self.fontSize)
 		self.dragOffset = Point(0, 0)
+		# for the incremental connection drawing
+		self.ports = [] # port visuals in layout order
+		self.portOffsets = {} # cached port center positions relative to the body
+		# for culling and level of detail
+		self.placed = False # body is placed on the background
+		self.visible = True # inside the visible region
+		self.lodItem = None # cheap canvas representation when zoomed out
 		
 		# setup layout
 		self.body = tk.Frame(self.graphEditor.bg, bg=COL_PRIM)
 		self.body.pack()
+		self.body.bind('<Configure>', self.onConfigure)
 		
 		# header
 		head = tk.Frame(self.body, bg=COL_MAIN, cursor='fleur')
@@ -105,22 +117,32 @@ class NodeVisual(object):
 		
 		# add inputs
 		for inp in self.node.inputs:
-			InputVisual(inp)
+			self.ports.append(InputVisual(inp))
 		
 		# add outputs
 		for out in self.node.outputs:
-			OutputVisual(out)
+			self.ports.append(OutputVisual(out))
 		
 		self.setPos(self.pos)
 	
 	def onDragStart(self, *args):
 		editorMousePos = self.graphEditor.mousePos()
-		editorNodePos = Point(self.body.winfo_x(), self.body.winfo_y())
-		self.dragOffset = editorNodePos-editorMousePos
+		self.dragOffset = self.pos-editorMousePos
 	
 	def onDragMotion(self, *args):
 		editorMousePos = self.graphEditor.mousePos()
 		self.setPos(editorMousePos+self.dragOffset)
+		# only the connections of this node have moved
+		self.graphEditor.updateConns(self.node)
+	
+	def onConfigure(self, e):
+		'''
+		Invalidates the cached port positions when the body was resized
+		'''
+		if e.width != self.size.x or e.height != self.size.y:
+			self.size = Point(e.width, e.height)
+			self.portOffsets.clear()
+			self.graphEditor.updateConns(self.node)
 	
 	def setPos(self, pos):
 		'''
@@ -128,14 +150,92 @@ class NodeVisual(object):
 		:param pos: new position as Point
 		'''
 		self.pos = pos
-		self.body.place(x=pos.x, y=pos.y)
+		self.updateView()
+	
+	def updateView(self):
+		'''
+		Places, hides or simplifies the node depending on 
+		the visible region and the zoom level of the editor
+		'''
+		editor = self.graphEditor
+		size = self.getSize()
+		self.visible = editor.inView(self.pos, self.pos+size)
+		detailed = editor.curZoom >= editor.lodZoom
+		# full representation with widgets
+		if self.visible and detailed:
+			self.body.place(x=self.pos.x, y=self.pos.y)
+			self.placed = True
+		elif self.placed:
+			self.body.place_forget()
+			self.placed = False
+		# level of detail representation with a canvas item
+		if self.visible and not detailed:
+			coords = (self.pos.x, self.pos.y, self.pos.x+size.x, self.pos.y+size.y)
+			if self.lodItem is None:
+				self.lodItem = editor.bg.create_rectangle(*coords, 
+					fill=COL_PRIM, outline=COL_MAIN, width=2, tags='node')
+				editor.lodNodes[self.lodItem] = self
+			else:
+				editor.bg.coords(self.lodItem, *coords)
+		elif self.lodItem is not None:
+			self.removeLOD()
+	
+	def removeLOD(self):
+		'''
+		Deletes the level of detail representation
+		'''
+		if self.lodItem is not None:
+			self.graphEditor.bg.delete(self.lodItem)
+			self.graphEditor.lodNodes.pop(self.lodItem, None)
+			self.lodItem = None
+	
+	def getSize(self):
+		'''
+		:returns: size of the body as Point, 
+			also when it was never shown on the background
+		'''
+		if self.size.x > 1:
+			return self.size
+		return Point(self.body.winfo_reqwidth(), self.body.winfo_reqheight())
+	
+	def portPos(self, portVisual):
+		'''
+		:param portVisual: input or output visual of this node
+		:returns: port center position relative to the background
+		'''
+		offset = self.portOffsets.get(portVisual)
+		if offset is None:
+			if self.placed and portVisual.port.winfo_ismapped():
+				# measure once, the offset stays valid until the body is resized
+				offset = self.graphEditor.widgetCenterPos(portVisual.port) - Point(
+					self.body.winfo_x(), self.body.winfo_y())
+				self.portOffsets[portVisual] = offset
+			else:
+				# estimate at the body border for hidden or simplified nodes
+				size = self.getSize()
+				rowHeight = size.y/(len(self.ports)+1.)
+				row = self.ports.index(portVisual)+1.5
+				offset = Point(size.x if isinstance(portVisual, OutputVisual) else 0, 
+					rowHeight*row)
+		return self.pos+offset
 	
 	def setScale(self, scale):
 		'''
 		Sets the node to a given size
 		:param scale: relative scale (normal is 1.0)
 		'''
+		# approximate the new size until the body gets resized
+		self.size = self.size*(scale/self.scale)
+		self.scale = scale
 		self.font.configure(size=int(self.fontSize*scale))
+	
+	def destroy(self):
+		'''
+		Removes all representations from the background
+		'''
+		self.removeLOD()
+		self.body.pack_forget()
+		self.body.destroy()
 
 
 class InputVisual(object):
@@ -292,11 +392,17 @@ class OutputVisual(object):
 		self.result.pack(side=tk.RIGHT)
 		self.setResult()
 	
-	def setResult(self):
+	def setResult(self, resultString=None):
 		'''
 		Updates the view to display the ports result
-		'''
-		resultString = shortString(self.output.result)
+		:param resultString: already shortened result, 
+			or None to take it from the port
+		'''
+		if resultString is None:
+			resultString = shortString(self.output.result)
+		shown = bool(self.result.winfo_manager())
+		if resultString == self.value.get() and shown == bool(resultString):
+			return # nothing changed, save the layout update
 		self.value.set(resultString)
 		self.resultVisible(True if resultString else False)
 	
@@ -336,6 +442,15 @@ class GraphEditor(object):
 		self.maxZoom = 3.0
 		self.curZoom = 1.0
 		self.lastZoom = self.curZoom
+		self.lodZoom = 0.7 # below this zoom, nodes are drawn simplified
+		self.lodNodes = {} # canvas item: simplified node visual
+		self.dragNodeItem = None
+		self.bg.tag_bind('node', '<Button-1>', self.onNodeItemDragStart)
+		self.bg.tag_bind('node', '<B1-Motion>', self.onNodeItemDragMotion)
+		
+		# setup culling of nodes and connections outside the visible region
+		self.viewSize = None # unknown until the background is shown
+		self.bg.bind('<Configure>', self.onResize)
 		# Windows and macOS
 		self.app.root.bind('<MouseWheel>', self.onScroll)
 		# Linux
@@ -344,8 +459,12 @@ class GraphEditor(object):
 		
 		# setup connections
 		self.dropTarget = None
+		self.dropPort = None
 		self.dragInput = None
 		self.dragOutput = None
+		self.connLines = {} # input port: canvas line item
+		self.hiddenLines = set() # culled line items
+		self.dragLine = None
 		self.bg.bind_all('<B1-Motion>', self.onConnDragging)
 		
 		# setup for panning graph
@@ -367,7 +486,26 @@ class GraphEditor(object):
 		return Point(
 			widget.winfo_rootx()-self.bg.winfo_rootx()+widget.winfo_width()/2, 
 			widget.winfo_rooty()-self.bg.winfo_rooty()+widget.winfo_height()/2)
-		
+	
+	def inView(self, topLeft, bottomRight, margin=20):
+		'''
+		:param topLeft/bottomRight: bounding box corners as Point
+		:returns: True when the bounding box overlaps the visible region
+		'''
+		if not self.viewSize:
+			return True # nothing known yet, so everything could be visible
+		return (bottomRight.x >= -margin and topLeft.x <= self.viewSize.x+margin and 
+			bottomRight.y >= -margin and topLeft.y <= self.viewSize.y+margin)
+	
+	def onResize(self, e):
+		'''
+		Updates the visible region when the background was resized
+		'''
+		self.viewSize = Point(e.width, e.height)
+		for node in self.graph.nodes:
+			node.visual.updateView()
+		self.drawConns()
+	
 	def onScroll(self, e):
 		'''
 		Hackfix for multiplatform
@@ -397,22 +535,26 @@ class GraphEditor(object):
 			newPos = oldPos*(1.0-move) + tarPos*move
 			nodeVisual.setPos(newPos)
 		
-		# update visual connections for massive changes
-		#self.bg.update() # accurate but extreme update lag
+		# update visual connections for massive changes. 
+		# Resized nodes will update their connections on their own
+		self.bg.itemconfig('conn', width=int(self.curZoom*2))
 		self.bg.after_idle(self.drawConns)
-		self.bg.after(100, self.drawConns)
 	
 	def onLeftClick(self, e):
 		'''
 		User clicked left on the background
 		'''
-		self.panStart = Point(e.x, e.y)
+		# simplified nodes are on the background too, but they are dragged
+		clickedNode = 'node' in self.bg.gettags(tk.CURRENT)
+		self.panStart = None if clickedNode else Point(e.x, e.y)
 		self.bg.focus_set() # to redirect key inputs here (space for searching)
 	
 	def onPanning(self, e):
 		'''
 		User is holding and dragging on the background
 		'''
+		if self.panStart is None:
+			return # dragging a simplified node
 		# get relative position since last left click
 		panPos = Point(e.x, e.y)
 		deltaPos = panPos-self.panStart
@@ -421,6 +563,23 @@ class GraphEditor(object):
 			oldPos = nodeVisual.pos
 			nodeVisual.setPos(oldPos+deltaPos)
 		self.panStart = panPos
+		self.drawConns()
+	
+	def onNodeItemDragStart(self, e):
+		'''
+		User clicked on a simplified node
+		'''
+		nodeVisual = self.lodNodes.get(self.bg.find_withtag(tk.CURRENT)[0])
+		if nodeVisual:
+			self.dragNodeItem = nodeVisual
+			nodeVisual.onDragStart()
+	
+	def onNodeItemDragMotion(self, e):
+		'''
+		User is dragging a simplified node
+		'''
+		if self.panStart is None and self.dragNodeItem:
+			self.dragNodeItem.onDragMotion()
 	
 	def onRightDown(self, e):
 		'''
@@ -457,20 +616,24 @@ class GraphEditor(object):
 			for connInput in out.connInputs:
 				connInput.visual.defaultVisible(True)
 		# remove from visual panel
-		node.visual.body.pack_forget()
-		node.visual.body.destroy()
+		node.visual.destroy()
 		# remove from logical graph
 		self.graph.removeNode(nodeName)
 		# update visual connections
 		self.drawConns()
 	
-	def updateResults(self):
+	def updateResults(self, results=None):
 		'''
 		Updates all output visuals to show current results
+		:param results: optional dictionary with shortened results 
+			per (node name, output name) from a Monitor snapshot
 		'''
 		for node in self.graph.nodes:
 			for out in node.outputs:
-				out.visual.setResult()
+				if results is None:
+					out.visual.setResult()
+				elif (node.name, out.name) in results:
+					out.visual.setResult(results[(node.name, out.name)])
 	
 	def fromDict(self, graphDict):
 		'''
@@ -570,13 +733,15 @@ class GraphEditor(object):
 		'''
 		Fires when mouse is pressed and moved globally
 		'''
+		if not (self.dragInput or self.dragOutput):
+			return # e.g. dragging a node or panning
 		try:
 			widget = self.bg.winfo_containing(e.x_root, e.y_root)
 			# get latest possible drop target
 			self.dropPort = getattr(widget, 'input', None)
 			self.dropPort = getattr(widget, 'output', self.dropPort)
-			# update visual connections
-			self.drawConns()
+			# only the dragged connection has changed
+			self.drawDragConn()
 		except:
 			pass # because errors on Linux when clicking on the toolbar
 	
@@ -616,45 +781,208 @@ class GraphEditor(object):
 		self.dragInput = None
 		self.dragOutput = None
 		self.dropPort = None
-		# update visual connections slow but accurate
-		self.bg.update()
-		self.bg.after_idle(self.drawConns)
+		self.drawDragConn()
+		# update visual connections. Nodes resized by showing/hiding 
+		# defaults and results will update their connections on their own
+		self.drawConns()
 	
-	def drawSpline(self, inPos, outPos):
+	def splineCoords(self, inPos, outPos):
 		'''
-		Draws a spline on the background between inPos and outPos
 		:param inPos/outPos: 2D position
+		:returns: control point coordinates of a spline between inPos and outPos
 		'''
 		xDiff = inPos.x-outPos.x
 		protude = min(100, abs(xDiff)*0.4)
-		self.bg.create_line(
-			inPos.x, inPos.y, inPos.x-protude, inPos.y, 
-			outPos.x+protude, outPos.y, outPos.x, outPos.y, 
-			smooth=1, fill=COL_MAIN, width=int(self.curZoom*2))
+		return (inPos.x, inPos.y, inPos.x-protude, inPos.y, 
+			outPos.x+protude, outPos.y, outPos.x, outPos.y)
+	
+	def drawSpline(self, coords):
+		'''
+		Draws a spline on the background
+		:param coords: control point coordinates from splineCoords
+		:returns: canvas item of the spline
+		'''
+		return self.bg.create_line(*coords, 
+			smooth=1, fill=COL_MAIN, width=int(self.curZoom*2), tags='conn')
+	
+	def updateConn(self, inp):
+		'''
+		Creates, moves or culls the visual connection of an input
+		:param inp: connected input port
+		'''
+		inPos = inp.node.visual.portPos(inp.visual)
+		out = inp.connOutput # connected counterpart
+		outPos = out.node.visual.portPos(out.visual)
+		coords = self.splineCoords(inPos, outPos)
+		line = self.connLines.get(inp)
+		# cull connections outside the visible region
+		if not self.inView(Point(min(coords[0::2]), min(coords[1::2])), 
+				Point(max(coords[0::2]), max(coords[1::2]))):
+			if line is not None and line not in self.hiddenLines:
+				self.bg.itemconfig(line, state=tk.HIDDEN)
+				self.hiddenLines.add(line)
+			return
+		if line is None:
+			self.connLines[inp] = self.drawSpline(coords)
+			self.bg.tag_lower('conn') # keep simplified nodes on top
+			return
+		self.bg.coords(line, *coords)
+		if line in self.hiddenLines:
+			self.bg.itemconfig(line, state=tk.NORMAL)
+			self.hiddenLines.discard(line)
+	
+	def updateConns(self, node):
+		'''
+		Updates only the visual connections from or to a node
+		'''
+		for inp in node.inputs:
+			if inp.isConnected():
+				self.updateConn(inp)
+		for out in node.outputs:
+			for connInput in out.connInputs:
+				self.updateConn(connInput)
+	
+	def drawDragConn(self):
+		'''
+		Draws the temporary/dragged connection
+		'''
+		if self.dragInput:
+			portPos = self.dragInput.nodeVisual.portPos(self.dragInput)
+			coords = self.splineCoords(portPos, self.mousePos())
+		elif self.dragOutput:
+			portPos = self.dragOutput.nodeVisual.portPos(self.dragOutput)
+			coords = self.splineCoords(self.mousePos(), portPos)
+		else:
+			# nothing dragged anymore
+			if self.dragLine is not None:
+				self.bg.delete(self.dragLine)
+				self.dragLine = None
+			return
+		if self.dragLine is None:
+			self.dragLine = self.drawSpline(coords)
+		else:
+			self.bg.coords(self.dragLine, *coords)
 	
 	def drawConns(self):
 		'''
-		Draws the current connections in the background
+		Updates the current connections in the background
 		'''
-		self.bg.delete(tk.ALL) # clear old content
-		# draw existing connections
+		# remove connections which do not exist anymore
+		for inp, line in list(self.connLines.items()):
+			if not inp.isConnected() or self.graph.nodeDict.get(inp.node.name) is not inp.node:
+				self.bg.delete(line)
+				self.hiddenLines.discard(line)
+				del self.connLines[inp]
+		# update existing connections
 		for node in self.graph.nodes:
 			for inp in node.inputs:
 				if inp.isConnected():
-					out = inp.connOutput # connected counterpart
-					# get port positions
-					inPos = self.widgetCenterPos(inp.visual.port)
-					outPos = self.widgetCenterPos(out.visual.port)
-					# draw spline
-					self.drawSpline(inPos, outPos)
+					self.updateConn(inp)
+		self.drawDragConn()
+
+
+def tokenize(text):
+	'''
+	:param text: e.g. a node name, class path or docstring
+	:returns: list of lowercase words, also split at camel case
+	'''
+	return [t.lower() for t in re.findall(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+', text)]
+
+
+class SearchIndex(object):
+	'''
+	Prefix index over node names, class paths and docstrings 
+	for ranked searching while the user is typing
+	'''
+	# how much a matching word counts, depending on where it was found
+	NAME_WEIGHT = 3
+	PATH_WEIGHT = 2
+	DOC_WEIGHT = 1
+	
+	def __init__(self):
+		self.entries = [] # (node name, class path) per entry id
+		self.prefixes = {} # word prefix: {entry id: weight}
+		self.words = {} # complete word: {entry id: weight}
+	
+	def add(self, name, path, doc=''):
+		'''
+		Indexes a node
+		:param name: display name of the node
+		:param path: class path of the node
+		:param doc: optional docstring of the node
+		'''
+		entryId = len(self.entries)
+		self.entries.append((name, path))
+		for text, weight in ((name, self.NAME_WEIGHT), 
+				(path, self.PATH_WEIGHT), (doc or '', self.DOC_WEIGHT)):
+			for word in tokenize(text):
+				self._insert(self.words, word, entryId, weight)
+				for end in range(1, len(word)+1):
+					self._insert(self.prefixes, word[:end], entryId, weight)
+	
+	def _insert(self, index, key, entryId, weight):
+		entries = index.setdefault(key, {})
+		if entries.get(entryId, 0) < weight:
+			entries[entryId] = weight
+	
+	def search(self, term, limit=10):
+		'''
+		:param term: search term, words may be incomplete
+		:param limit: maximum number of results
+		:returns: list of (node name, class path), best matches first
+		'''
+		words = tokenize(term)
+		if not words:
+			return []
+		# every word must be the beginning of a word of the entry
+		scores = None
+		for word in words:
+			matches = self.prefixes.get(word, {})
+			exact = self.words.get(word, {})
+			if scores is None:
+				scores = dict((i, w+exact.get(i, 0)) for i, w in matches.items())
+			else:
+				scores = dict((i, scores[i]+w+exact.get(i, 0)) 
+					for i, w in matches.items() if i in scores)
+		ranked = sorted(scores, key=lambda i: (
+			-scores[i], len(self.entries[i][0]), self.entries[i][0]))
+		results = [self.entries[i] for i in ranked[:limit]]
 		
-		# draw temporary/dragged connection
-		if self.dragInput:
-			portPos = self.widgetCenterPos(self.dragInput.port)
-			self.drawSpline(portPos, self.mousePos())
-		if self.dragOutput:
-			portPos = self.widgetCenterPos(self.dragOutput.port)
-			self.drawSpline(self.mousePos(), portPos)
+		if len(results) < limit:
+			# fuzzy matches for typos and abbreviations like "flrng", 
+			# only among the entries with a word starting like the query
+			query = ''.join(words)
+			fuzzy = []
+			for i in self.prefixes.get(query[0], {}):
+				if i in scores:
+					continue
+				name = self.entries[i][0]
+				span = self.fuzzySpan(query, name.lower())
+				if span:
+					fuzzy.append((span, len(name), name, i))
+			fuzzy.sort()
+			results.extend(self.entries[f[-1]] for f in fuzzy[:limit-len(results)])
+		return results
+	
+	@staticmethod
+	def fuzzySpan(query, text):
+		'''
+		:returns: length of the shortest text part that contains 
+			all query characters in order, or 0 when the text does not contain them
+		'''
+		shortest = 0
+		start = text.find(query[0])
+		while start >= 0:
+			# the earliest end for this start
+			pos = start
+			for char in query[1:]:
+				pos = text.find(char, pos+1)
+				if pos < 0:
+					return shortest # later starts cannot end either
+			if not shortest or pos-start+1 < shortest:
+				shortest = pos-start+1
+			start = text.find(query[0], start+1)
+		return shortest
 
 
 class NodeDatabase(object):
@@ -667,6 +995,8 @@ class NodeDatabase(object):
 		
 		# node search related
 		self.nodesDict = {}
+		self.nodesDoc = {}
+		self.searchIndex = SearchIndex()
 		self.searchTerm = tk.StringVar()
 		self.searchTerm.trace('w', self.onSearching)
 		self.graphEditor.bg.bind('<space>', lambda _: self.openSearch())
@@ -680,9 +1010,17 @@ class NodeDatabase(object):
 		self.searchField.pack(fill=tk.X, padx=4, pady=(0, 4))
 		self.searchField.bind('<Escape>', lambda _: self.closeSearch())
 		self.searchField.bind('<Return>', lambda _: self.selectFirstResult())
-		# search result list
+		# search result list with reused labels
 		self.searchResults = tk.Frame(self.searchPanel, bg=COL_BG)
 		self.searchResults.pack(fill=tk.BOTH, expand=True)
+		self.resultLabels = []
+		self.resultPaths = []
+		for iResult in range(15):
+			found = tk.Label(self.searchResults, anchor='w', 
+				bg=COL_PRIM, fg=COL_HL, font=('Arial', 12))
+			setupHoverColor(found)
+			found.bind('<Button-1>', lambda e, i=iResult: self.selectResult(self.resultPaths[i]))
+			self.resultLabels.append(found)
 		
 		# catch internal nodes
 		self.makeNodeMenu(nodes, nodes.__name__, self.menu, self.nodesDict)
@@ -701,6 +1039,8 @@ class NodeDatabase(object):
 		
 		# add search item
 		self.menu.add_command(label='Search...', underline=0, command=self.openSearch)
+		for nodeName, nodePath in self.nodesDict.items():
+			self.searchIndex.add(nodeName, nodePath, self.nodesDoc.get(nodeName))
 	
 	def makeNodeMenu(self, member, pkgName, parentMenu, nodeDict={}):
 		'''
@@ -725,6 +1065,7 @@ class NodeDatabase(object):
 			# insert in dictionary
 			nodePath = '{}.{}'.format(parentMenu.path, memName)
 			nodeDict[itemName] = nodePath
+			self.nodesDoc[itemName] = inspect.getdoc(member)
 			# make menu item
 			parentMenu.add_command(label=itemName, underline=0, 
 				command=lambda p=nodePath: self.graphEditor.spawnNode(p))
@@ -745,19 +1086,16 @@ class NodeDatabase(object):
 		'''
 		Makes a list containing node names matching the searchterm
 		'''
-		# clear old results
-		for child in self.searchResults.winfo_children():
-			child.destroy()
-		if not term:
-			return
-		# populate list with results
-		for nodeName, nodePath in self.nodesDict.items():
-			if term.lower() in nodeName.lower():
-				found = tk.Label(self.searchResults, text=nodeName, anchor='w', 
-					bg=COL_PRIM, fg=COL_HL, font=('Arial', 12))
-				setupHoverColor(found)
-				found.bind('<Button-1>', lambda e, p=nodePath: self.selectResult(p))
-				found.pack(fill=tk.X)
+		results = self.searchIndex.search(term, len(self.resultLabels)) if term else []
+		# reuse the labels, the first ones are always shown in order
+		for iResult, found in enumerate(self.resultLabels):
+			if iResult < len(results):
+				found.config(text=results[iResult][0])
+				if iResult >= len(self.resultPaths):
+					found.pack(fill=tk.X)
+			elif iResult < len(self.resultPaths):
+				found.pack_forget()
+		self.resultPaths = [nodePath for _, nodePath in results]
 	
 	def openSearch(self):
 		'''
@@ -784,10 +1122,8 @@ class NodeDatabase(object):
 		'''
 		Spawns first node in search result list
 		'''
-		results = self.searchResults.winfo_children()
-		if results:
-			first = results[0]
-			self.selectResult(self.nodesDict[first.cget('text')])
+		if self.resultPaths:
+			self.selectResult(self.resultPaths[0])
 	
 	def selectResult(self, nodePath):
 		'''
@@ -797,13 +1133,29 @@ class NodeDatabase(object):
 		self.closeSearch()
 
 
-class LogHandler(object):
+class LogHandler(logging.Handler):
 	'''
-	Logging and warnings
+	Logging and warnings.
+	Records may come from any thread and are buffered in bounded queues. 
+	They are formatted and shown in batches by the main loop.
 	'''
-	def __init__(self, app):
+	def __init__(self, app, maxRecords=2000, maxLines=5000, flushInterval=0.05):
+		'''
+		:param app: the FlowApp
+		:param maxRecords: maximum number of records buffered between flushes. 
+			When more are incoming, the oldest get dropped
+		:param maxLines: maximum number of lines kept in the log scroll
+		:param flushInterval: time in seconds between showing new records
+		'''
+		logging.Handler.__init__(self)
+		self.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
 		self.app = app
 		self.enabled = True # enabling or disabling logging
+		self.records = deque(maxlen=maxRecords) # ring buffer for normal logs
+		self.alerts = deque(maxlen=100) # ring buffer for warnings
+		self.dropped = 0 # records which did not fit in the ring buffer
+		self.maxLines = maxLines
+		self.flushInterval = flushInterval
 		
 		# get package loggers
 		self.loggers = []
@@ -827,6 +1179,7 @@ class LogHandler(object):
 		self.alert.pack_forget() # initially not visible
 		
 		self.enableLog(False) # initially, disable normal logs
+		self.showRecords() # start showing incoming records
 	
 	def enableLog(self, enable):
 		'''
@@ -868,35 +1221,64 @@ class LogHandler(object):
 		'''
 		Resets the warnings in the alert panel
 		'''
+		self.alerts.clear()
 		self.alert.config(text='')
 		self.alert.pack_forget()
 	
-	def write(self, msg):
+	def emit(self, record):
 		'''
-		This method is called from the logging module for each message
+		This method is called from the logging module for each record. 
+		It only buffers the record, formatting is done when showing it.
 		'''
-		if any(lvl in msg for lvl in ('WARNING', 'ERROR', 'CRITICAL')):
+		if record.levelno >= logging.WARNING:
 			# user needs attention
-			self.warn(msg)
+			self.alerts.append(record)
 		
 		if self.enabled:
 			# normal logging
-			self.logScroll.insert(tk.END, msg)
+			if len(self.records) == self.records.maxlen:
+				self.dropped += 1
+			self.records.append(record)
 	
-	def flush(self):
+	def showRecords(self):
 		'''
-		This method might be called from the logging module
+		Formats and shows the buffered records at once. 
+		Is called periodically from the main loop
 		'''
-		pass
+		# warnings
+		warnings = []
+		while self.alerts:
+			warnings.append(self.format(self.alerts.popleft()))
+		if warnings:
+			self.warn('\n'.join(warnings))
+		
+		# normal logs
+		lines = []
+		if self.dropped:
+			lines.append('... {} messages skipped ...'.format(self.dropped))
+			self.dropped = 0
+		while self.records:
+			lines.append(self.format(self.records.popleft()))
+		if lines and self.enabled:
+			self.logScroll.insert(tk.END, '\n'.join(lines)+'\n')
+			# limit the lines in the log scroll
+			numLines = int(self.logScroll.index('end-1c').split('.')[0])
+			if numLines > self.maxLines:
+				self.logScroll.delete(1.0, '{}.0'.format(numLines-self.maxLines))
+			self.logScroll.see(tk.END) # only once for all new lines
+		
+		self.app.root.after(int(1e3*self.flushInterval), self.showRecords)
 	
 	def tail(self):
 		'''
 		Scrolls down to the last messages
 		'''
 		if self.enabled:
-			self.logScroll.see(tk.END) # super useful but super slow
+			self.logScroll.see(tk.END)
 	
 	def clear(self):
+		self.records.clear()
+		self.dropped = 0
 		self.logScroll.delete(1.0, tk.END)
 
 
@@ -914,6 +1296,8 @@ class FlowApp(object):
 		self.step = 0 # for manual processing nodes step-by-step
 		self.graphStop = threading.Event() # for stopping the graph
 		self.graphThread = None
+		self.graphMonitor = Monitor(0.1) # for showing results while processing
+		self.lastSnapshot = None
 		
 		# initially place in the middle of the screen
 		size = Point(1280, 720)
@@ -931,7 +1315,9 @@ class FlowApp(object):
 		
 		# setup logging
 		self.logHandler = LogHandler(self)
-		logging.basicConfig(stream=self.logHandler, level=logging.WARNING)
+		rootLogger = logging.getLogger()
+		rootLogger.addHandler(self.logHandler)
+		rootLogger.setLevel(logging.WARNING)
 		
 		# start working
 		while True:
@@ -1049,17 +1435,36 @@ class FlowApp(object):
 		return True
 	
 	def _graphRun(self, stopper):
+		# runs in its own thread, so don't touch any widgets here
 		try:
-			self.stats.set('processing...')
-			_, iterCount, iterTime = self.graphEditor.graph.process(stopper)
-			self.stats.set('{} | {:.2f} ms'.format(iterCount, 1e3*iterTime))
+			self.graphEditor.graph.process(stopper, self.graphMonitor)
 		except:
-			self.stats.set('')
 			log.exception('Graph processing failed')
-		self.graphEditor.updateResults() # update visual results
-		self.logHandler.tail()
 		stopper.clear()
 	
+	def pollGraph(self):
+		'''
+		Shows the latest results of the processing graph. 
+		Is called periodically from the main loop, 
+		because only this thread may update the widgets
+		'''
+		running = self.graphThread.is_alive()
+		snapshot = self.graphMonitor.fetch()
+		if snapshot:
+			self.lastSnapshot = snapshot
+			self.graphEditor.updateResults(snapshot['results'])
+			self.stats.set('{} | {:.2f} ms{}'.format(snapshot['iterations'], 
+				1e3*snapshot['time'], '' if snapshot['finished'] else ' ...'))
+		if running:
+			self.root.after(int(1e3*self.graphMonitor.interval), self.pollGraph)
+			return
+		# processing stopped
+		if not (self.lastSnapshot and self.lastSnapshot['finished']) or self.lastSnapshot['error']:
+			# failed, so show what is left
+			self.stats.set(self.lastSnapshot and self.lastSnapshot['error'] or '')
+			self.graphEditor.updateResults()
+		self.logHandler.tail()
+	
 	def onRun(self):
 		'''
 		Runs the graph and shows the results
@@ -1069,8 +1474,12 @@ class FlowApp(object):
 		
 		self.onReset() # preparations
 		# start processing
+		self.stats.set('processing...')
+		self.graphMonitor.fetch() # drop outdated snapshot
+		self.lastSnapshot = None
 		self.graphThread = threading.Thread(target=self._graphRun, args=(self.graphStop,))
 		self.graphThread.start()
+		self.root.after(int(1e3*self.graphMonitor.interval), self.pollGraph)
 	
 	def onStep(self):
 		'''
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Processing feedback loops of a graph in a tight inner loop.
+Each loop region, i.e. nodes which are connected in a circle,
+is processed repeatedly until it settled, instead of once per graph iteration.
+'''
+from __future__ import nested_scopes, generators, with_statement, unicode_literals, absolute_import, division, print_function
+
+import logging # for reporting loops which did not settle
+
+log = logging.getLogger(__name__)
+
+def findLoopRegions(runOrder):
+	'''
+	Finds the strongly connected parts of the graph,
+	i.e. the nodes from which data can come back to themselves
+
+	:param runOrder: nodes in run order
+	:returns: list of loop regions, each a list of nodes in run order
+	'''
+	position = dict((node, pos) for pos, node in enumerate(runOrder))
+	# iterative Tarjan algorithm, as graphs may be too deep for recursion
+	index = {}
+	lowLink = {}
+	stack = []
+	onStack = set()
+	regions = []
+	for start in runOrder:
+		if start in index:
+			continue
+		work = [(start, None)]
+		while work:
+			node, successors = work.pop()
+			if successors is None:
+				index[node] = lowLink[node] = len(index)
+				stack.append(node)
+				onStack.add(node)
+				successors = iter([inp.node for out in node.outputs
+					for inp in out.connInputs if inp.node in position])
+			for succ in successors:
+				if succ not in index:
+					work.append((node, successors))
+					work.append((succ, None))
+					break
+				elif succ in onStack:
+					lowLink[node] = min(lowLink[node], index[succ])
+			else:
+				if work:
+					parent = work[-1][0]
+					lowLink[parent] = min(lowLink[parent], lowLink[node])
+				if lowLink[node] == index[node]:
+					region = []
+					while True:
+						member = stack.pop()
+						onStack.discard(member)
+						region.append(member)
+						if member is node:
+							break
+					# a single node is only a loop when connected to itself
+					if len(region) > 1 or any(inp.node is node
+							for out in node.outputs for inp in out.connInputs):
+						regions.append(sorted(region, key=lambda n: position[n]))
+	return sorted(regions, key=lambda region: position[region[0]])
+
+
+def isClose(value, lastValue, tolerance):
+	'''
+	:returns: True when a value is equal to the last value,
+		or for numbers, not more different than the tolerance
+	'''
+	try:
+		return abs(value-lastValue) <= tolerance
+	except TypeError:
+		return value == lastValue
+
+
+class LoopRegion(object):
+	'''
+	Processes the nodes of a loop region repeatedly in one graph step,
+	until none of them is busy anymore, the values fed back converged,
+	data was pushed to a node outside of the region 
+	or the iteration limit is reached. In the latter cases, the region
+	continues in the next graph iteration, so the receiving nodes process 
+	the data before more is coming and the graph can still be aborted.
+	'''
+	def __init__(self, nodes, maxIterations=1000, tolerance=None, converged=None):
+		'''
+		:param nodes: nodes of the region in run order
+		:param maxIterations: maximum number of inner iterations per graph step
+		:param tolerance: optional maximum change of the values fed back
+			to consider the loop converged
+		:param converged: optional function(values, lastValues) which returns True
+			when converged, where the values are the last data fed back
+			to each looped input (or None)
+		'''
+		self.nodes = nodes
+		self.name = ', '.join(node.name for node in nodes)
+		self.loopInputs = [inp for node in nodes for inp in node.inputs if inp.looped]
+		inRegion = set(nodes)
+		# inputs of other nodes receiving data from the region
+		self.exitInputs = [inp for node in nodes for out in node.outputs 
+			for inp in out.connInputs if inp.node not in inRegion]
+		self.maxIterations = maxIterations
+		self.tolerance = tolerance
+		self.converged = converged
+		# statistics
+		self.numSteps = 0
+		self.numIterations = 0
+		self.mostIterations = 0
+		self.numConverged = 0
+		self.numLimited = 0
+		self.numDelivered = 0
+	
+	def fedBack(self):
+		'''
+		:returns: list with the last data waiting at each looped input, or None
+		'''
+		return [inp.buffer[-1] if inp.buffer else None for inp in self.loopInputs]
+	
+	def isConverged(self, values, lastValues):
+		if self.converged:
+			return self.converged(values, lastValues)
+		return all(value is not None and lastValue is not None and
+			isClose(value, lastValue, self.tolerance)
+			for value, lastValue in zip(values, lastValues))
+	
+	def collect(self):
+		'''
+		Is called instead of the "collect" method of all nodes in the region
+		'''
+		testing = self.converged or self.tolerance is not None
+		lastValues = None
+		iteration = 0
+		while True:
+			if iteration >= self.maxIterations:
+				self.numLimited += 1
+				log.info('Loop {} did not settle within {} iterations'.format(
+					self.name, self.maxIterations))
+				break
+			iteration += 1
+			for node in self.nodes:
+				node.collect()
+			if all(not node.busy for node in self.nodes):
+				break
+			if any(inp.buffer for inp in self.exitInputs):
+				# let the receiving nodes process it first, so their buffers stay small
+				self.numDelivered += 1
+				break
+			if testing:
+				values = self.fedBack()
+				if lastValues is not None and self.isConverged(values, lastValues):
+					# stop feeding back, the loop only continues with new incoming data
+					for inp in self.loopInputs:
+						inp.clear()
+					self.numConverged += 1
+					break
+				lastValues = values
+		self.numSteps += 1
+		self.numIterations += iteration
+		self.mostIterations = max(self.mostIterations, iteration)
+	
+	def stats(self):
+		'''
+		:returns: dictionary with the statistics of the region since preparing
+		'''
+		return {'nodes': [node.name for node in self.nodes], 'steps': self.numSteps,
+			'iterations': self.numIterations, 'mostIterations': self.mostIterations,
+			'converged': self.numConverged, 'limitReached': self.numLimited, 
+			'delivered': self.numDelivered}
@@ -1,5 +1,7 @@
 import logging # for debugging the dataflow
 import copy # for deep copying data when output pushes to multiple inputs
+from collections import deque # for the input buffers
+from types import GeneratorType # for processes which push data over several iterations
 
 log = logging.getLogger(__name__)
 
@@ -81,6 +83,9 @@ class Node(object):
 	Base node class.
 	May be configured to have arbitrary number of inputs and outputs.
 	'''
+	cost = 1. # rough relative processing cost, e.g. for splitting pipelines
+	pure = False # True when same inputs always give the same outputs without side effects, e.g. for folding and caching
+	formula = None # elementwise formula of the inputs like "({a}+{b})", for fusing chains of nodes
 	
 	def __init__(self, name='Node'):
 		'''
@@ -91,9 +96,8 @@ class Node(object):
 		self.output = {}
 		self.name = name
 		self.busy = False
-	
-	def __del__(self):
-		self.disconnect() # disconnect from other nodes before deleting
+		self.numFilled = 0 # number of inputs with data in their buffer
+		self.pending = None # process generator, which continues in the next iterations
 	
 	def addInput(self, name, *args, **kwargs):
 		'''
@@ -137,13 +141,19 @@ class Node(object):
 		'''
 		# reset inputs
 		for inp in self.inputs:
-			inp.buffer = []
+			inp.buffer = InputBuffer(inp)
 			inp.looped = False
 			inp.defaultUsed = False
+		self.numFilled = 0
+		if self.pending is not None:
+			self.pending.close()
+			self.pending = None
 		
 		# reset outputs
 		for out in self.outputs:
 			out.result = None
+			if out.history is not None:
+				out.history.clear()
 		
 		self.prepare() # in case there something to prepare
 	
@@ -151,20 +161,77 @@ class Node(object):
 		'''
 		Is called every graph iteration.
 		Synchronizes data and calls "process" when all inputs are ready.
-		'''
-		log.debug('{} is collecting data'.format(self.name))
+		When "process" is a generator, it is continued until the next "yield"
+		in each iteration, before new data is processed.
+		'''
+		if self.pending is not None and self.advance():
+			return
+		debug = log.isEnabledFor(logging.DEBUG) # don't format messages for nothing
+		if debug:
+			log.debug('{} is collecting data'.format(self.name))
 		if all(inp.couldPull() for inp in self.inputs):
 			self.busy = True
-			log.debug('{} can process\n'.format(self.name))
+			if debug:
+				log.debug('{} can process\n'.format(self.name))
 			# get data from the inputs when all could pull
 			data = {}
 			for inp in self.inputs:
 				data[inp.name] = inp.pull()
 			# process data
-			self.process(**data)
+			result = self.process(**data)
+			if isinstance(result, GeneratorType):
+				# e.g. pushing the records of a file one by one
+				self.pending = result
+				self.advance()
 		else:
 			self.busy = False
-			log.debug('{} can NOT process\n'.format(self.name))
+			if debug:
+				log.debug('{} can NOT process\n'.format(self.name))
+	
+	def advance(self):
+		'''
+		Continues the pending process generator until its next "yield"
+
+		:returns: True when it continued, False when it was finished
+		'''
+		self.busy = True
+		try:
+			next(self.pending)
+			return True
+		except StopIteration:
+			self.pending = None
+			return False
+	
+	def expression(self, inputs):
+		'''
+		Builds the formula of the node for fusing it with other nodes. 
+		It may only use operators and the functions listed in flow.fusion.
+
+		:param inputs: dictionary with input name: expression string of its value
+		:returns: expression string of the output value, or None if not possible
+		'''
+		if self.formula is None:
+			return None
+		return self.formula.format(**inputs)
+	
+	def declares(self, *names):
+		'''
+		:param names: names of class attributes or methods describing the process method, 
+			like "pure" or "formula"
+		:returns: True when the first class defining any of them is the class 
+			defining process or a subclass of it, i.e. a subclass overriding process 
+			does not inherit them
+		'''
+		mro = type(self).__mro__
+		declaring = next(cls for cls in mro if any(name in cls.__dict__ for name in names))
+		processing = next(cls for cls in mro if 'process' in cls.__dict__)
+		return issubclass(declaring, processing)
+	
+	def isPure(self):
+		'''
+		:returns: True when the class of the node declares pure = True for its process method
+		'''
+		return self.pure and self.declares('pure')
 	
 	def process(self, **inputData):
 		'''
@@ -188,6 +255,107 @@ class Node(object):
 		pass
 
 
+_append, _popleft = deque.append, deque.popleft # without the counting of InputBuffer
+
+
+class InputBuffer(deque):
+	'''
+	Queue for the data of an input port. 
+	InputPort.put, pull and clear use the deque methods directly. 
+	Changing it otherwise, as nodes did when it was a list, 
+	e.g. by buffer.pop(0), buffer.append(data) or buffer += items, also keeps 
+	the number of filled inputs of the node right
+	'''
+	def __init__(self, port):
+		deque.__init__(self)
+		self.port = port
+	
+	def __reduce__(self):
+		# for copying and pickling, the data is restored without counting.
+		# the port is left out, else its whole graph would be copied with it.
+		# a copied InputPort attaches itself to the copy of its buffer again
+		return (InputBuffer, (None,), list(self))
+	
+	def __setstate__(self, state):
+		deque.extend(self, state)
+	
+	def changed(self, wasFilled):
+		if wasFilled != bool(self) and self.port is not None:
+			self.port.node.numFilled += 1 if self else -1
+	
+	def append(self, data):
+		wasFilled = bool(self)
+		deque.append(self, data)
+		self.changed(wasFilled)
+	
+	def appendleft(self, data):
+		wasFilled = bool(self)
+		deque.appendleft(self, data)
+		self.changed(wasFilled)
+	
+	def extend(self, items):
+		wasFilled = bool(self)
+		deque.extend(self, items)
+		self.changed(wasFilled)
+	
+	def __iadd__(self, items):
+		self.extend(items)
+		return self
+	
+	def extendleft(self, items):
+		wasFilled = bool(self)
+		deque.extendleft(self, items)
+		self.changed(wasFilled)
+	
+	def insert(self, index, data):
+		wasFilled = bool(self)
+		deque.insert(self, index, data)
+		self.changed(wasFilled)
+	
+	def pop(self, index=-1):
+		'''
+		:param index: like list.pop, e.g. 0 for the oldest data
+		'''
+		wasFilled = bool(self)
+		if index == -1:
+			data = deque.pop(self)
+		elif index == 0:
+			data = deque.popleft(self)
+		else:
+			data = self[index]
+			del self[index]
+		self.changed(wasFilled)
+		return data
+	
+	def popleft(self):
+		wasFilled = bool(self)
+		data = deque.popleft(self)
+		self.changed(wasFilled)
+		return data
+	
+	def remove(self, data):
+		wasFilled = bool(self)
+		deque.remove(self, data)
+		self.changed(wasFilled)
+	
+	def clear(self):
+		wasFilled = bool(self)
+		deque.clear(self)
+		self.changed(wasFilled)
+	
+	def __delitem__(self, index):
+		wasFilled = bool(self)
+		if isinstance(index, slice):
+			# like for lists, e.g. del buffer[:]
+			items = list(self)
+			del items[index]
+			deque.clear(self)
+			deque.extend(self, items)
+		else:
+			deque.__delitem__(self, index)
+		self.changed(wasFilled)
+
+
 class InputPort(object):
 	'''
 	Node input.
@@ -205,7 +373,7 @@ class InputPort(object):
 		'''
 		self.default = default
 		self.connOutput = None # the output of the connected node
-		self.buffer = [] # queue for the data
+		self._buffer = InputBuffer(self) # queue for the data, see buffer, put, pull and clear
 		self.looped = False # set by the graph when part of a loop
 		self.defaultUsed = False
 		self.name = name
@@ -216,6 +384,28 @@ class InputPort(object):
 		else:
 			self.ptype = ptype
 	
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self._buffer.port = self # as copies of the buffer leave out the port
+	
+	@property
+	def buffer(self):
+		'''
+		Queue for the data, an InputBuffer
+		'''
+		return self._buffer
+	
+	@buffer.setter
+	def buffer(self, items):
+		# also other items, e.g. a list assigned by a node as when the buffer was one
+		if not isinstance(items, InputBuffer) or items.port is not self:
+			buffer = InputBuffer(self)
+			deque.extend(buffer, items)
+			items = buffer
+		if bool(self._buffer) != bool(items):
+			self.node.numFilled += 1 if items else -1
+		self._buffer = items
+	
 	def connect(self, output):
 		'''
 		:param output: output port of a node to connect to
@@ -240,39 +430,47 @@ class InputPort(object):
 		'''
 		:returns: True when data available, False when not
 		'''
-		log.debug('Check if {} could pull:'.format(self.name))
-		if self.buffer:
-			log.debug('\tYes, from buffer')
+		if self._buffer:
 			return True # take from buffer in normal cases
-		elif self.looped or not self.isConnected():
-			log.debug('\tNot from buffer, but might use default')
+		elif self.looped or self.connOutput is None:
 			# when not connected or in a loop, we might need the default.
 			if self.default is None:
-				log.debug('\tNo, have no default')
 				return False
 			# however, use only once as long as other inputs don't have data.
-			if not self.defaultUsed:
-				log.debug('\tYes, using default')
-				return True
-			if any(inp.buffer for inp in self.node.inputs if inp is not self):
-				log.debug('\tYes, using default because other inputs have data')
-				return True
-			log.debug('\tNo, because default already used and other inputs have no data')
+			# the buffer of this input is empty, so any filled input is another one
+			return not self.defaultUsed or self.node.numFilled > 0
 		else:
-			log.debug('\tNo, because neither data in buffer nor unconnected or looped')
+			# neither data in buffer nor unconnected or looped
 			return False
 	
+	def put(self, data):
+		'''
+		Appends data to the buffer
+		'''
+		if not self._buffer:
+			self.node.numFilled += 1
+		_append(self._buffer, data)
+	
 	def pull(self):
 		'''
 		:returns: data from the buffer/queue or default value
 		'''
-		if self.buffer:
-			return self.buffer.pop(0) # take from buffer in normal cases
+		if self._buffer:
+			data = _popleft(self._buffer) # take from buffer in normal cases
+			if not self._buffer:
+				self.node.numFilled -= 1
+			return data
 		else:
 			self.defaultUsed = True
 			return self.default # take default when no data available
-			
-		return None
+	
+	def clear(self):
+		'''
+		Removes all data from the buffer
+		'''
+		if self._buffer:
+			self.node.numFilled -= 1
+			deque.clear(self._buffer)
 
 
 class OutputPort(object):
@@ -289,6 +487,9 @@ class OutputPort(object):
 		'''
 		self.connInputs = [] # list of inputs from connected nodes
 		self.result = None # should be used to catch final results for sink ports
+		self.history = None # optional bounded queue with the last results
+		self.produced = None # optional queue to stream results while processing
+		self.recorded = None # optional list (or object with append) to record all pushed data
 		self.name = name
 		self.node = node
 		self.ptype = ptype
@@ -319,8 +520,9 @@ class OutputPort(object):
 			self.connInputs.remove(inp)
 		elif inp is None:
 			# disconnect all inputs
-			while self.connInputs:
-				self.disconnect(self.connInputs[0])
+			for connInput in self.connInputs:
+				connInput.connOutput = None
+			self.connInputs = []
 	
 	def isConnected(self):
 		'''
@@ -333,15 +535,24 @@ class OutputPort(object):
 		Pushes data into the buffer of all connected inputs 
 		or save as result if unconnected.
 		'''
+		if self.recorded is not None:
+			self.recorded.append((self, data))
 		if self.isConnected():
 			share = 0
+			info = log.isEnabledFor(logging.INFO) # don't format messages for nothing
 			for inp in self.connInputs:
 				share += 1
-				log.info('{}.{} pushing data out to {}.{}'.format(
-					self.node.name, self.name, inp.node.name, inp.name))
+				if info:
+					log.info('{}.{} pushing data out to {}.{}'.format(
+						self.node.name, self.name, inp.node.name, inp.name))
 				if share > 1:
-					inp.buffer.append(copy.deepcopy(data))
+					inp.put(copy.deepcopy(data))
 				else:
-					inp.buffer.append(data)
+					inp.put(data)
 		else:
-			self.result = data
\ No newline at end of file
+			self.result = data
+			# copies, as the node may change the data after pushing it out
+			if self.history is not None:
+				self.history.append(copy.deepcopy(data))
+			if self.produced is not None:
+				self.produced.append((self.node, self, copy.deepcopy(data)))
\ No newline at end of file
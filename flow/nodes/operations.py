@@ -14,6 +14,9 @@ class Operation(Node):
 
 
 class Add(Operation):
+	pure = True
+	formula = '({a}+{b})'
+	
 	def __init__(self):
 		Operation.__init__(self, 'Addition')
 	
@@ -22,6 +25,9 @@ class Add(Operation):
 
 
 class Sub(Operation):
+	pure = True
+	formula = '({a}-{b})'
+	
 	def __init__(self):
 		Operation.__init__(self, 'Subtraction')
 	
@@ -30,6 +36,9 @@ class Sub(Operation):
 
 
 class Mul(Operation):
+	pure = True
+	formula = '({a}*{b})'
+	
 	def __init__(self):
 		Operation.__init__(self, 'Multiplication')
 	
@@ -38,6 +47,9 @@ class Mul(Operation):
 
 
 class Div(Operation):
+	pure = True
+	formula = '({a}/{b})'
+	
 	def __init__(self):
 		Operation.__init__(self, 'Division')
 	
@@ -46,6 +58,9 @@ class Div(Operation):
 
 
 class Pow(Operation):
+	pure = True
+	formula = '({a}**{b})'
+	
 	def __init__(self):
 		Operation.__init__(self, 'Power')
 	
@@ -54,6 +69,8 @@ class Pow(Operation):
 
 
 class MinMax(Operation):
+	pure = True
+	
 	def __init__(self):
 		Operation.__init__(self, 'Min Max')
 		self.resOut.name = 'lower'
@@ -68,6 +85,9 @@ class Exp(Node):
 	'''
 	Exponent of a value
 	'''
+	pure = True
+	formula = 'exp({x})'
+	
 	def __init__(self):
 		Node.__init__(self, 'Exponent')
 		self.addInput('x', 0.)
@@ -81,6 +101,9 @@ class Log(Node):
 	'''
 	Logarithm of a value
 	'''
+	pure = True
+	formula = '(log({x})/log({base}))' # like math.log(x, base)
+	
 	def __init__(self):
 		Node.__init__(self, 'Logarithm')
 		self.addInput('x', 1.)
@@ -105,17 +128,36 @@ class AngleFunc(Node):
 	
 	def angleFunc(self, *args):
 		raise NotImplementedError('angleFunc not implemented')
+	
+	def funcName(self):
+		'''
+		:returns: name of the function by the current defaults, 
+			or None when the function is chosen by a connected input
+		'''
+		if self.input['deg'].isConnected() or self.input['hyperb'].isConnected():
+			return None
+		return (self.hyperFunc if self.input['hyperb'].default else self.angleFunc).__name__
 
 
 class AngleTo(AngleFunc):
 	'''
 	Base class for angle functions with angle to function conversion
 	'''
+	pure = True
+	
 	def __init__(self, name):
 		AngleFunc.__init__(self, name)
 		self.addInput('angle', 0.)
 		self.resOut = self.addOutput('value', Ptype.FLOAT)
 	
+	def expression(self, inputs):
+		name = self.funcName()
+		if name is None:
+			return None
+		if self.input['deg'].default:
+			return '{}(radians({}))'.format(name, inputs['angle'])
+		return '{}({})'.format(name, inputs['angle'])
+	
 	def process(self, deg, hyperb, angle):
 		if deg:
 			angle = math.radians(angle)
@@ -127,11 +169,21 @@ class ToAngle(AngleFunc):
 	'''
 	Base class for angle functions with function to angle conversion
 	'''
+	pure = True
+	
 	def __init__(self, name):
 		AngleFunc.__init__(self, name)
 		self.addInput('value', 0.)
 		self.resOut = self.addOutput('angle', Ptype.FLOAT)
 	
+	def expression(self, inputs):
+		name = self.funcName()
+		if name is None:
+			return None
+		if self.input['deg'].default:
+			return 'degrees({}({}))'.format(name, inputs['value'])
+		return '{}({})'.format(name, inputs['value'])
+	
 	def process(self, deg, hyperb, value):
 		# hyperFunc and angleFunc have to be defined by inheritated class!
 		angle = self.hyperFunc(value) if hyperb else self.angleFunc(value)
@@ -186,6 +238,8 @@ class ConditionalData(Node):
 	'''
 	Outputs from 1 of 2 inputs, depending on condition
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Conditional data')
 		self.addInput('condition', True)
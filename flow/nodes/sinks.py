@@ -1,9 +1,19 @@
 from flow.node import Node, Ptype
+from flow.arrayfile import isNpy, descrOf, toBytes, readHeader, writeHeader, headerSize, moveData, HEADER_SIZE
+from flow.compressed import openFile
+import os # for checking if files exist
+import json # for writing JSON records
+try:
+	import orjson # for fast writing of JSON records
+except ImportError:
+	orjson = None
 
 class Print(Node):
 	'''
 	Formats input data as string
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Print')
 		self.addInput('data')
@@ -17,6 +27,8 @@ class DictSink(Node):
 	'''
 	Adds / replaces a key:value pair to a dictionary
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Dictionary')
 		self.dictIn = self.addInput('dictionary', {})
@@ -35,22 +47,28 @@ class DictSink(Node):
 class FileSink(Node):
 	'''
 	Writes input data as lines to a file 
-	specified by a path string input
+	specified by a path string input.
+	Files named .gz, .bz2, .xz or .zst are compressed with the level,
+	where -1 is the default of the format
 	'''
+	cost = 10. # waiting for I/O
+	pure = False # writes the file
+	
 	def __init__(self):
 		Node.__init__(self, 'File sink')
 		self.addInput('string', ptype=Ptype.STR)
 		self.addInput('filepath', '/Path/To/File.suffix', ptype=Ptype.FILE)
 		self.addInput('append', False) # adding as lines or overwriting
+		self.addInput('level', -1) # compression level
 		# only technical needed to have a result value (the path when finished)
 		self.pathOut = self.addOutput('filepath', Ptype.STR)
 		# for faster processing, we let the file object open until the graph finished.
 		# alternatively, open and close it in the process method, using "with"
 		self.file = None
 	
-	def process(self, string, filepath, append):
+	def process(self, string, filepath, append, level):
 		if not self.file:
-			self.file = open(filepath, 'a' if append else 'w')
+			self.file = openFile(filepath, 'a' if append else 'w', level)
 		# append data to file
 		self.file.write(string+'\n' if append else string)
 		self.pathOut.push(filepath)
@@ -59,4 +77,116 @@ class FileSink(Node):
 		if self.file:
 			# close the file when graph finished
 			self.file.close()
-			self.file = None
\ No newline at end of file
+			self.file = None
+
+
+class JsonSink(Node):
+	'''
+	Writes records as one JSON line each (NDJSON) to a file.
+	With batch, a list of records is written as a line per record.
+	Uses orjson for serializing when installed
+	'''
+	cost = 10. # waiting for I/O
+	pure = False # writes the file
+	
+	def __init__(self):
+		Node.__init__(self, 'JSON sink')
+		self.addInput('records')
+		self.addInput('filepath', '/Path/To/File.json', ptype=Ptype.FILE)
+		self.addInput('append', False) # adding to the file or overwriting
+		self.addInput('batch', False)
+		self.pathOut = self.addOutput('filepath', Ptype.STR)
+		self.file = None # open until the graph finished, like in FileSink
+	
+	def dumps(self, record):
+		'''
+		:returns: JSON line as bytes
+		'''
+		if orjson:
+			try:
+				return orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS|orjson.OPT_APPEND_NEWLINE)
+			except TypeError:
+				pass # e.g. for integers bigger than 64 bit, which json can write
+		return json.dumps(record, separators=(',', ':')).encode('utf-8')+b'\n'
+	
+	def process(self, records, filepath, append, batch):
+		if not self.file:
+			self.file = open(filepath, 'ab' if append else 'wb')
+		if batch and isinstance(records, list):
+			self.file.write(b''.join(self.dumps(record) for record in records))
+		else:
+			self.file.write(self.dumps(records))
+		self.pathOut.push(filepath)
+	
+	def finish(self):
+		if self.file:
+			self.file.close()
+			self.file = None
+
+
+class ArraySink(Node):
+	'''
+	Appends arrays of numbers as blocks to a binary file, 
+	a .npy file or else raw data without header.
+	The .npy header gets the final shape when the graph finished,
+	so the file can be loaded with numpy.load or memory mapped by ArraySource.
+	The type is taken from the first block, e.g. float64 for floats.
+	Blocks of lists may contain rows as lists of the same shape, like 2D arrays
+	'''
+	cost = 10. # waiting for I/O
+	pure = False # writes the file
+	
+	def __init__(self):
+		Node.__init__(self, 'Array sink')
+		self.addInput('array', ptype=Ptype.LIST)
+		self.addInput('filepath', '/Path/To/File.npy', ptype=Ptype.FILE)
+		self.addInput('append', False) # adding to an existing file or overwriting
+		self.pathOut = self.addOutput('filepath', Ptype.STR)
+		self.file = None # open until the graph finished, like in FileSink
+	
+	def open(self, filepath, append, block):
+		self.descr, self.rowShape = descrOf(block)
+		self.numRows = 0
+		self.headerSize = 0 # for raw files
+		if append and os.path.exists(filepath):
+			self.file = open(filepath, 'r+b')
+			if isNpy(filepath):
+				descr, shape, fortran, self.headerSize = readHeader(self.file)
+				if fortran or not shape or shape[1:] != self.rowShape:
+					self.file.close()
+					self.file = None
+					raise ValueError('{} cannot append rows of shape {} to {} of shape {}'.format(
+						self.name, self.rowShape, filepath, shape))
+				self.descr = descr
+				self.numRows = shape[0]
+				# files written by numpy may have a header too small for the final shape
+				size = headerSize(descr, (2**63,)+self.rowShape)
+				if size > self.headerSize:
+					moveData(self.file, self.headerSize, size)
+					writeHeader(self.file, descr, shape, size)
+					self.headerSize = size
+			self.file.seek(0, 2)
+		else:
+			self.file = open(filepath, 'w+b')
+			if isNpy(filepath):
+				writeHeader(self.file, self.descr, (0,)+self.rowShape)
+				self.headerSize = HEADER_SIZE
+	
+	def process(self, array, filepath, append):
+		if not self.file:
+			self.open(filepath, append, array)
+		else:
+			rowShape = descrOf(array)[1]
+			if len(array) and rowShape != self.rowShape:
+				raise ValueError('{} got rows of shape {} instead of {}'.format(
+					self.name, rowShape, self.rowShape))
+		self.file.write(toBytes(array, self.descr))
+		self.numRows += len(array)
+		self.pathOut.push(filepath)
+	
+	def finish(self):
+		if self.file:
+			if self.headerSize:
+				writeHeader(self.file, self.descr, (self.numRows,)+self.rowShape, self.headerSize)
+			self.file.close()
+			self.file = None
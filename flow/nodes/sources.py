@@ -1,13 +1,43 @@
 from flow.node import Node, Ptype
+from flow.arrayfile import isNpy, dtypeDescr, fromBytes, readHeader
+from flow.compressed import openFile, codecOf, ReadAhead
 import os # for listing files in directories
 import fnmatch # for filtering filenames
 import random # for random numbers
+import zlib # for deriving random streams from node names
+from itertools import islice # for reading batches of lines
+import io # for reading text files with encoding in python 2 and 3
+import json # for reading JSON records
+import csv # for reading CSV files
+import threading # for listing directories in parallel
+try:
+	# for python 2
+	from Queue import Queue
+except ImportError:
+	# for python 3
+	from queue import Queue
+try:
+	# for python 3
+	from collections.abc import Sequence # for lazy float ranges
+except ImportError:
+	# for python 2
+	from collections import Sequence
+try:
+	import numpy # for fast random number generation and CSV columns
+except ImportError:
+	numpy = None
+try:
+	import orjson # for fast parsing of JSON records
+except ImportError:
+	orjson = None
 
 
 class IntegerSource(Node):
 	'''
 	Provides a integer number on its output
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Int out')
 		# Automatically assign same datatype to output as the input
@@ -23,6 +53,8 @@ class FloatSource(Node):
 	'''
 	Provides a float number on its output
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Float out')
 		inp = self.addInput('value', 0.0)
@@ -36,6 +68,8 @@ class BooleanSource(Node):
 	'''
 	Provides a bool value on its output
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Bool out')
 		inp = self.addInput('value', True)
@@ -49,6 +83,8 @@ class StringSource(Node):
 	'''
 	Provides a string on its output
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'String out')
 		inp = self.addInput('value', 'Hello')
@@ -62,6 +98,8 @@ class ComplexSource(Node):
 	'''
 	Provides a complex number on its output
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Complex out')
 		self.addInput('re', 0.0)
@@ -76,6 +114,8 @@ class DictSource(Node):
 	'''
 	Gets a value specified by key from a dictionary
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Value from dictionary')
 		self.addInput('dictionary', {})
@@ -87,35 +127,99 @@ class DictSource(Node):
 			self.valOut.push(dictionary[key])
 
 
+class FloatRange(Sequence):
+	'''
+	Lazy sequence of the values start + step*i, like range for floats.
+	The values are calculated when accessed, exactly like in a list of them
+	'''
+	def __init__(self, start, step, indices):
+		'''
+		:param indices: range of the i values
+		'''
+		self.start = start
+		self.step = step
+		self.indices = indices
+	
+	def __len__(self):
+		return len(self.indices)
+	
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return FloatRange(self.start, self.step, self.indices[index])
+		return self.start + self.step*self.indices[index]
+	
+	def __iter__(self):
+		start, step = self.start, self.step
+		for i in self.indices:
+			yield start + step*i
+	
+	def __repr__(self):
+		return 'FloatRange(start={}, step={}, indices={})'.format(
+			self.start, self.step, self.indices)
+	
+	def __deepcopy__(self, memo):
+		return self # immutable
+
+
 class RangeSource(Node):
 	'''
-	Abstract class for range sources
+	Abstract class for range sources.
+	When lazy, the array is a range (or FloatRange) which is not stored in memory.
+	With a chunk size, the elements are pushed in blocks of that size, one per graph iteration,
+	as NumPy arrays if available, else as lists.
 	'''
-	def __init__(self, name):
+	pure = True
+	
+	def __init__(self, name, start, step, stop):
 		Node.__init__(self, name)
+		self.addInput('start', start)
+		self.addInput('step', step)
+		self.addInput('stop', stop)
+		self.addInput('lazy', False)
+		self.addInput('chunk', 0)
 		self.arrOut = self.addOutput('array', Ptype.LIST)
 		self.elOut = self.addOutput('elements')
 		self.lenOut = self.addOutput('length', Ptype.INT)
 	
-	def seq(self, start, stop, step=1):
+	def indices(self, start, stop, step=1):
+		'''
+		:returns: range of the indices i of the values start + step*i
+		'''
 		# sanity checks
 		if stop < start and step > 0:
-			return []
+			return range(0)
 		if stop > start and step < 0:
-			return []
-		# make array
-		n = abs(int(round((stop-start)/float(step))))
-		if n > 0:
-			return [start + step*i for i in range(n)]
-		else:
-			return []
+			return range(0)
+		return range(abs(int(round((stop-start)/float(step)))))
 	
-	def process(self, start, step, stop):
-		arr = self.seq(start, stop, step)
+	def seq(self, start, stop, step=1):
+		return [start + step*i for i in self.indices(start, stop, step)]
+	
+	def lazySeq(self, start, stop, step=1):
+		'''
+		:returns: range for integers, else FloatRange, with the same values as seq
+		'''
+		indices = self.indices(start, stop, step)
+		if isinstance(start, int) and isinstance(step, int):
+			return range(start, start+step*len(indices), step) if indices else range(0)
+		return FloatRange(start, step, indices)
+	
+	def process(self, start, step, stop, lazy, chunk):
+		arr = self.lazySeq(start, stop, step) if lazy else self.seq(start, stop, step)
 		self.arrOut.push(arr)
 		self.lenOut.push(len(arr))
-		for el in arr:
-			self.elOut.push(el)
+		if chunk > 0:
+			# push one chunk per graph iteration, so only one is in memory at a time
+			for first in range(0, len(arr), chunk):
+				last = min(first+chunk, len(arr))
+				if numpy:
+					self.elOut.push(start + step*numpy.arange(first, last))
+				else:
+					self.elOut.push(list(arr[first:last]))
+				yield
+		else:
+			for el in arr:
+				self.elOut.push(el)
 
 
 class IntegerRangeSource(RangeSource):
@@ -123,10 +227,7 @@ class IntegerRangeSource(RangeSource):
 	Provides an int range array and its length on the outputs
 	'''
 	def __init__(self):
-		RangeSource.__init__(self, 'Int range out')
-		self.addInput('start', 1)
-		self.addInput('step', 1)
-		self.addInput('stop', 10)
+		RangeSource.__init__(self, 'Int range out', 1, 1, 10)
 
 
 class FloatRangeSource(RangeSource):
@@ -134,76 +235,548 @@ class FloatRangeSource(RangeSource):
 	Provides a float range array and its length on the outputs
 	'''
 	def __init__(self):
-		RangeSource.__init__(self, 'Float range out')
-		self.addInput('start', 0.)
-		self.addInput('step', 0.1)
-		self.addInput('stop', 1.)
+		RangeSource.__init__(self, 'Float range out', 0., 0.1, 1.)
 
 
 class NoiseSource(Node):
 	'''
-	Provides random float numbers on its output
+	Provides random float numbers on its output, 
+	one by one or as block (NumPy array if available, else list).
+	With a seed >= 0, the numbers are reproducible. The stream number 
+	selects an independent sequence for the same seed, e.g. one per sweep point 
+	or parallel worker. Different nodes get different sequences by their name.
 	'''
+	pure = False # random
+	
 	def __init__(self):
 		Node.__init__(self, 'Noise out')
 		self.addInput('low', 0.)
 		self.addInput('high', 1.)
 		self.addInput('gauss', False)
 		self.addInput('numElements', 1)
+		self.addInput('block', False) # push all elements at once
+		self.addInput('seed', -1) # negative for not reproducible numbers
+		self.addInput('stream', 0)
 		self.noiseOut = self.addOutput('float', Ptype.FLOAT)
+		self.rng = None
+		self.rngKey = None
+	
+	def prepare(self):
+		self.rng = None # start the sequence again
 	
-	def process(self, low, high, gauss, numElements):
-		for _ in range(numElements):
+	def generator(self, seed, stream):
+		'''
+		:returns: numpy.random.Generator, or without NumPy random.Random
+			or the random module when not seeded
+		'''
+		key = (seed, stream, self.name)
+		if self.rng is None or key != self.rngKey:
+			self.rngKey = key
+			nameKey = zlib.crc32(self.name.encode('utf-8')) & 0xffffffff
+			if numpy:
+				seq = numpy.random.SeedSequence(seed if seed >= 0 else None, 
+					spawn_key=(stream, nameKey))
+				self.rng = numpy.random.default_rng(seq)
+			elif seed >= 0:
+				self.rng = random.Random('{}/{}/{}'.format(seed, stream, nameKey))
+			else:
+				self.rng = random
+		return self.rng
+	
+	def process(self, low, high, gauss, numElements, block, seed, stream):
+		rng = self.generator(seed, stream)
+		mean = (low+high)/2.
+		std = (high-mean)/2. # 95% coverage should be enough
+		if numpy:
 			if gauss:
-				mean = (low+high)/2.
-				std = (high-mean)/2. # 95% coverage should be enough
-				self.noiseOut.push(random.gauss(mean, std))
+				values = rng.normal(mean, std, numElements)
 			else:
-				self.noiseOut.push(random.uniform(low, high))
+				values = rng.uniform(low, high, numElements)
+			if block:
+				self.noiseOut.push(values)
+				return
+			values = values.tolist()
+		elif gauss:
+			values = [rng.gauss(mean, std) for _ in range(numElements)]
+		else:
+			values = [rng.uniform(low, high) for _ in range(numElements)]
+		if block:
+			self.noiseOut.push(values)
+		else:
+			for value in values:
+				self.noiseOut.push(value)
 
 
 class FileSource(Node):
 	'''
 	Reads lines from a file specified by a path string 
-	and pushes out the line strings
+	and pushes out the line strings.
+	With batch > 0, lists of up to that many lines are pushed out,
+	which the string nodes process at once.
+	One line or list is pushed per graph iteration, so the file is not held in memory.
+	Compressed files (.gz, .bz2, .xz, .zst) are decompressed on the fly,
+	with readAhead in another thread while the lines are processed
 	'''
+	cost = 10. # waiting for I/O
+	pure = False # the file may change
+	
 	def __init__(self):
 		Node.__init__(self, 'File source')
 		self.addInput('filepath', '/Path/To/File.suffix', ptype=Ptype.FILE)
 		self.addInput('aslines', True)
+		self.addInput('batch', 0)
+		self.addInput('readAhead', True)
 		self.lineOut = self.addOutput('string', Ptype.STR)
 	
-	def process(self, filepath, aslines):
-		with open(filepath) as file:
-			if aslines:
-				# push out lines
-				for line in file:
-					self.lineOut.push(line)
-			else:
+	def process(self, filepath, aslines, batch, readAhead):
+		with openFile(filepath) as file:
+			if not aslines:
 				# push out whole file content
 				self.lineOut.push(file.read())
+				return
+			reader = ReadAhead(file) if readAhead and codecOf(filepath) else None
+			try:
+				lines = iter(reader) if reader else file
+				if batch > 0:
+					# push out lists of lines
+					while True:
+						chunk = list(islice(lines, batch))
+						if not chunk:
+							break
+						self.lineOut.push(chunk)
+						yield
+				else:
+					# push out lines
+					for line in lines:
+						self.lineOut.push(line)
+						yield
+			finally:
+				if reader:
+					reader.close()
+
+
+class CsvSource(Node):
+	'''
+	Reads a CSV file in blocks of rows and pushes out each block as dictionary
+	with column name: NumPy array of the column values (list without NumPy).
+	A block is pushed per graph iteration, so only 1 block is kept in memory.
+	Column types are given by dtypes or else guessed from the first block:
+	int, float (empty values are NaN) or str (always lists).
+	Guessed types are widened from int to float to str for later blocks 
+	with values which do not fit, so earlier blocks may have narrower types
+	'''
+	cost = 10. # waiting for I/O
+	pure = False # the file may change
+	types = {'int': int, 'float': float, 'str': str}
+	
+	def __init__(self):
+		Node.__init__(self, 'CSV source')
+		self.addInput('filepath', '/Path/To/File.csv', ptype=Ptype.FILE)
+		self.addInput('chunk', 10000) # rows per block
+		self.addInput('columns', []) # names or indices of the columns to read, all if empty
+		self.addInput('dtypes', {}) # column name: "int", "float" or "str"
+		self.addInput('delimiter', ',')
+		self.addInput('header', True) # first row has the column names
+		self.blockOut = self.addOutput('block', Ptype.DICT)
+	
+	def convert(self, values, dtype):
+		'''
+		:param values: strings of a column
+		:param dtype: int, float or str
+		:returns: NumPy array or list
+		'''
+		if dtype is str:
+			return list(values)
+		try:
+			if numpy:
+				return numpy.array(values, dtype=dtype)
+			return list(map(dtype, values))
+		except ValueError:
+			if dtype is not float:
+				raise
+			converted = [float(value) if value.strip() else float('nan') for value in values]
+			return numpy.array(converted) if numpy else converted
+	
+	def guessType(self, values, narrowest=int):
+		'''
+		:param narrowest: type to start with, e.g. the one guessed for previous blocks
+		:returns: the first of int, float and str which can convert all values
+		'''
+		order = (int, float, str)
+		for dtype in order[order.index(narrowest):-1]:
+			try:
+				self.convert(values, dtype)
+				return dtype
+			except ValueError:
+				pass
+		return str
+	
+	def process(self, filepath, chunk, columns, dtypes, delimiter, header):
+		with io.open(filepath, newline='') as file:
+			reader = csv.reader(file, delimiter=str(delimiter))
+			names = next(reader, []) if header else None
+			rows = list(islice(reader, max(1, chunk)))
+			if names is None:
+				names = [str(i) for i in range(len(rows[0]) if rows else 0)]
+			selected = []
+			for column in columns or range(len(names)):
+				if isinstance(column, int):
+					selected.append(column)
+				elif column in names:
+					selected.append(names.index(column))
+				else:
+					raise KeyError('{} has no column {} in {}'.format(self.name, column, filepath))
+			colTypes = {}
+			guessed = set() # indices of the columns without given dtype
+			for index in selected:
+				if names[index] in dtypes:
+					colTypes[index] = self.types[dtypes[names[index]]]
+			
+			numRows = 1 if header else 0
+			while rows:
+				if len(set(map(len, rows))) > 1 or len(rows[0]) != len(names):
+					for row in rows:
+						numRows += 1
+						if len(row) != len(names):
+							raise ValueError('{}: row {} of {} has {} instead of {} values'.format(
+								self.name, numRows, filepath, len(row), len(names)))
+				numRows += len(rows)
+				values = list(zip(*rows))
+				block = {}
+				for index in selected:
+					if index not in colTypes:
+						colTypes[index] = self.guessType(values[index])
+						guessed.add(index)
+					try:
+						block[names[index]] = self.convert(values[index], colTypes[index])
+					except ValueError:
+						if index not in guessed:
+							raise
+						# widen the type, e.g. for float values after int ones
+						colTypes[index] = self.guessType(values[index], colTypes[index])
+						block[names[index]] = self.convert(values[index], colTypes[index])
+				self.blockOut.push(block)
+				yield # one block per graph iteration
+				rows = list(islice(reader, max(1, chunk)))
+
+
+class ArraySource(Node):
+	'''
+	Reads a binary array file, a .npy file or else raw data of the given type.
+	With NumPy, the file is memory mapped and the array or its blocks are pushed out 
+	as read-only views, so nothing is parsed and only the used pages are loaded.
+	Without NumPy, blocks are read as 1-dimensional array.array.
+	With chunk > 0, blocks of that many rows are pushed, one per graph iteration
+	'''
+	cost = 10. # waiting for I/O
+	pure = False # the file may change
+	
+	def __init__(self):
+		Node.__init__(self, 'Array source')
+		self.addInput('filepath', '/Path/To/File.npy', ptype=Ptype.FILE)
+		self.addInput('dtype', 'float64') # type of raw files, like "int32"
+		self.addInput('chunk', 0) # rows per block, 0 for the whole array
+		self.arrOut = self.addOutput('array', Ptype.LIST)
+	
+	def mapBlocks(self, filepath, dtype, chunk):
+		'''
+		:returns: NumPy memmap, or list of its slices
+		'''
+		if isNpy(filepath):
+			arr = numpy.load(filepath, mmap_mode='r')
+		elif os.path.getsize(filepath):
+			arr = numpy.memmap(filepath, dtype=dtype, mode='r')
+		else:
+			arr = numpy.empty(0, dtype) # cannot map empty files
+		if chunk > 0:
+			return [arr[first:first+chunk] for first in range(0, len(arr), chunk)]
+		return [arr]
+	
+	def readBlocks(self, filepath, dtype, chunk):
+		'''
+		:returns: generator of array.array blocks
+		'''
+		with open(filepath, 'rb') as file:
+			if isNpy(filepath):
+				descr, shape, fortran, _ = readHeader(file)
+				if fortran and len(shape) > 1:
+					raise ValueError('{} can only read C ordered arrays without NumPy'.format(self.name))
+				rowSize = 1
+				for dim in shape[1:]:
+					rowSize *= dim
+				remaining = rowSize*shape[0] if shape else 1
+			else:
+				descr = dtypeDescr(dtype)
+				rowSize = 1
+				remaining = None
+			itemSize = int(descr[2:])
+			while True:
+				numItems = chunk*rowSize if chunk > 0 else remaining
+				if remaining is not None:
+					numItems = min(numItems, remaining)
+					remaining -= numItems
+				data = file.read(numItems*itemSize if numItems is not None else -1)
+				if data or chunk <= 0:
+					yield fromBytes(data, descr)
+				if not data or chunk <= 0:
+					return
+	
+	def process(self, filepath, dtype, chunk):
+		if numpy:
+			blocks = self.mapBlocks(filepath, dtype, chunk)
+		else:
+			blocks = self.readBlocks(filepath, dtype, chunk)
+		for block in blocks:
+			self.arrOut.push(block)
+			yield # one block per graph iteration
+
+
+def listDir(dirpath):
+	'''
+	Lists a directory like os.walk, i.e. links to directories are no files
+	and are not followed
+
+	:returns: list of file names, list of subdirectory names
+	'''
+	files = []
+	subdirs = []
+	if hasattr(os, 'scandir'):
+		for entry in os.scandir(dirpath):
+			if not entry.is_dir():
+				files.append(entry.name)
+			elif not entry.is_symlink():
+				subdirs.append(entry.name)
+	else:
+		# for python 2
+		for name in os.listdir(dirpath):
+			path = os.path.join(dirpath, name)
+			if not os.path.isdir(path):
+				files.append(name)
+			elif not os.path.islink(path):
+				subdirs.append(name)
+	return files, subdirs
 
 
 class FileSearchSource(Node):
 	'''
-	Searches for files with pattern in name in directory
+	Searches for files with pattern in name in directory.
+	Subdirectories are listed by multiple threads, which helps on network drives.
+	With batch > 0, lists of up to that many paths are pushed as they are found,
+	one per graph iteration, else one list with all paths.
+	Names or relative paths matching one of the exclude patterns are skipped,
+	for directories including their content.
+	If ordered, the paths come in the order of os.walk, 
+	else as soon as their directory is listed, which varies between runs.
+	With cache, the listing of each directory is kept and reused 
+	while the modification time of the directory stays the same
 	'''
+	cost = 10. # waiting for I/O
+	pure = False # the directory may change
+	maxCached = 100000 # maximum number of cached directory listings
+	
 	def __init__(self):
 		Node.__init__(self, 'File search')
 		self.addInput('dirpath', '/Path/To/Directory', ptype=Ptype.FILE)
 		self.addInput('subdirs', False) # also search in subdirectories
 		self.addInput('pattern', '*')
+		self.addInput('exclude', []) # patterns like "*.tmp" or ".git"
+		self.addInput('batch', 0)
+		self.addInput('threads', 4) # for listing subdirectories
+		self.addInput('cache', False)
+		self.addInput('ordered', True)
 		self.filesOut = self.addOutput('files', Ptype.LIST)
+		self.index = {} # directory path: (modification time, files, subdirectories)
+		self.indexLock = threading.Lock() # as the workers list in parallel
+	
+	def listCached(self, dirpath, cache):
+		'''
+		:returns: list of file names, list of subdirectory names
+		'''
+		if not cache:
+			return listDir(dirpath)
+		mtime = os.stat(dirpath).st_mtime
+		entry = self.index.get(dirpath)
+		if entry is None or entry[0] != mtime:
+			entry = (mtime,)+listDir(dirpath)
+			with self.indexLock:
+				if dirpath not in self.index and len(self.index) >= self.maxCached:
+					self.index.pop(next(iter(self.index))) # the oldest one in python 3
+				self.index[dirpath] = entry
+		return entry[1], entry[2]
+	
+	def walk(self, dirpath, numThreads, cache, ordered=True):
+		'''
+		Lists the directory and its subdirectories in parallel
+
+		:param ordered: give the directories top-down in the order of os.walk, 
+			else in the order they were listed
+		:returns: generator of (relative directory path, file names, subdirectory names)
+		'''
+		tasks = Queue()
+		results = Queue()
+		def work():
+			while True:
+				relDir = tasks.get()
+				if relDir is None:
+					return
+				try:
+					files, subdirs = self.listCached(os.path.join(dirpath, relDir) if relDir else dirpath, cache)
+				except OSError:
+					files, subdirs = [], [] # ignored like in os.walk
+				results.put((relDir, files, subdirs))
+		
+		workers = [threading.Thread(target=work) for _ in range(max(1, numThreads))]
+		for worker in workers:
+			worker.daemon = True
+			worker.start()
+		try:
+			tasks.put('')
+			pending = 1
+			order = [''] # stack of the directories to give next, if ordered
+			listed = {} # relative directory path: result, listed before its turn
+			while pending:
+				if ordered:
+					relDir = order.pop()
+					while relDir not in listed:
+						result = results.get()
+						listed[result[0]] = result
+					_, files, subdirs = listed.pop(relDir)
+				else:
+					relDir, files, subdirs = results.get()
+				pending -= 1
+				subdirs = yield relDir, files, subdirs
+				relDirs = [os.path.join(relDir, name) if relDir else name for name in subdirs]
+				for path in relDirs:
+					tasks.put(path)
+					pending += 1
+				order.extend(reversed(relDirs))
+		finally:
+			# also when the graph stops before the search finished
+			for _ in workers:
+				tasks.put(None)
 	
-	def process(self, dirpath, subdirs, pattern):
-		if subdirs:
-			# search in subdirectories
-			filepaths = []
-			for root, _, files in os.walk(dirpath):
-				paths = [os.path.relpath(os.path.join(root, filename), dirpath) for filename in fnmatch.filter(files, pattern)]
-				filepaths.extend(paths)
+	def excluded(self, name, relPath, exclude):
+		return any(fnmatch.fnmatch(name, pat) or fnmatch.fnmatch(relPath, pat) for pat in exclude)
+	
+	def process(self, dirpath, subdirs, pattern, exclude, batch, threads, cache, ordered):
+		if not subdirs:
+			# search only in specified directory
+			files = [name for name in fnmatch.filter(os.listdir(dirpath), pattern)
+				if not self.excluded(name, name, exclude)]
+			chunks = [files[first:first+batch] for first in range(0, len(files), batch)] if batch > 0 else [files]
+			for chunk in chunks:
+				self.filesOut.push(chunk)
+				yield
+			return
+		
+		# search in subdirectories
+		filepaths = []
+		numPushed = 0
+		walker = self.walk(dirpath, threads, cache, ordered)
+		found = next(walker, None)
+		while found:
+			relDir, files, dirs = found
+			for name in fnmatch.filter(files, pattern):
+				relPath = os.path.join(relDir, name) if relDir else name
+				if not exclude or not self.excluded(name, relPath, exclude):
+					filepaths.append(relPath)
+			if exclude:
+				dirs = [name for name in dirs if not self.excluded(name, 
+					os.path.join(relDir, name) if relDir else name, exclude)]
+			if batch > 0 and len(filepaths) >= batch:
+				while len(filepaths) >= batch:
+					self.filesOut.push(filepaths[:batch])
+					filepaths = filepaths[batch:]
+					numPushed += 1
+				yield
+			try:
+				found = walker.send(dirs)
+			except StopIteration:
+				found = None
+		if filepaths or not numPushed:
 			self.filesOut.push(filepaths)
+
+
+
+class JsonSource(Node):
+	'''
+	Reads JSON records from a file and pushes them out one by one, 
+	or with batch > 0, in lists of up to that many records.
+	The file may contain one record per line (NDJSON), 
+	or a JSON array, whose elements are read as a stream.
+	A record or batch is pushed per graph iteration, 
+	so only the current records are kept in memory, not the whole file.
+	Uses orjson for parsing lines when installed, 
+	which reads integers beyond 64 bit as floats
+	'''
+	cost = 10. # waiting for I/O
+	pure = False # the file may change
+	chunkSize = 1 << 16 # characters read at once from JSON arrays
+	
+	def __init__(self):
+		Node.__init__(self, 'JSON source')
+		self.addInput('filepath', '/Path/To/File.json', ptype=Ptype.FILE)
+		self.addInput('batch', 0)
+		self.recOut = self.addOutput('records')
+	
+	def readLines(self, filepath):
+		'''
+		:returns: generator of the records of a NDJSON file
+		'''
+		loads = orjson.loads if orjson else json.loads
+		with open(filepath, 'rb') as file:
+			for line in file:
+				if line.strip():
+					yield loads(line)
+	
+	def readArray(self, filepath):
+		'''
+		:returns: generator of the elements of a JSON array file
+		'''
+		decode = json.JSONDecoder().raw_decode
+		with io.open(filepath, encoding='utf-8') as file:
+			text = file.read(self.chunkSize)
+			pos = text.index('[')+1
+			eof = False
+			while True:
+				# skip to the next element
+				while pos < len(text) and text[pos] in ' \t\r\n,':
+					pos += 1
+				if pos < len(text) and text[pos] == ']':
+					return
+				try:
+					if pos >= len(text):
+						raise ValueError('Incomplete')
+					element, end = decode(text, pos)
+					# a number may continue in the next chunk
+					complete = end < len(text) or eof
+				except ValueError:
+					if eof:
+						raise ValueError('Invalid JSON array in {} at {:.50}'.format(filepath, text[pos:]))
+					complete = False
+				if complete:
+					yield element
+					pos = end
+				else:
+					# read more, at least doubling the text of a big element
+					chunk = file.read(max(self.chunkSize, len(text)-pos))
+					eof = not chunk
+					text = text[pos:]+chunk
+					pos = 0
+	
+	def process(self, filepath, batch):
+		with open(filepath, 'rb') as file:
+			isArray = file.read(self.chunkSize).lstrip()[:1] == b'['
+		records = self.readArray(filepath) if isArray else self.readLines(filepath)
+		# push one record or batch per graph iteration
+		if batch > 0:
+			while True:
+				chunk = list(islice(records, batch))
+				if not chunk:
+					break
+				self.recOut.push(chunk)
+				yield
 		else:
-			# search only in specified directory
-			files = fnmatch.filter(os.listdir(dirpath), pattern)
-			self.filesOut.push(files)
\ No newline at end of file
+			for record in records:
+				self.recOut.push(record)
+				yield
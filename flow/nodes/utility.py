@@ -3,11 +3,199 @@ import time # for the pause node
 import platform # for choosing the best clock timing per OS
 from datetime import datetime # for getting timestamps
 import json # for the dict/str converter nodes
+import re # for the regular expression nodes
+from operator import itemgetter # for finding extrema with their index
+import array as typedarray # for packing numbers without NumPy
+import sys # for the int type code and checking if pooled buffers are still referenced
+try:
+	import numpy # for fast paths with arrays
+except ImportError:
+	numpy = None
+
+rangeType = type(range(0)) # lazy ranges (lists in python 2)
+
+
+def isNumpyArray(array):
+	return numpy is not None and isinstance(array, numpy.ndarray)
+
+
+def argExtremum(array, pick):
+	'''
+	Finds the first maximum or minimum of an array
+
+	:param array: list, tuple, range, NumPy array or any other iterable
+	:param pick: max or min
+	:returns: index and value
+	'''
+	if isNumpyArray(array):
+		index = int(array.argmax() if pick is max else array.argmin())
+		return index, array.flat[index]
+	if isinstance(array, (list, tuple, typedarray.array)):
+		# 2 passes in C are faster than 1 in Python
+		value = pick(array)
+		return array.index(value), value
+	if isinstance(array, rangeType) and len(array):
+		# values are sorted
+		index = len(array)-1 if (array.step > 0) == (pick is max) else 0
+		return index, array[index]
+	return pick(enumerate(array), key=itemgetter(1))
+
+
+def findIndex(array, value):
+	'''
+	:returns: index of the first occurrence of the value in the array, or None
+	'''
+	if isNumpyArray(array):
+		indices = numpy.flatnonzero(array == value)
+		return int(indices[0]) if len(indices) else None
+	try:
+		return array.index(value)
+	except ValueError:
+		return None
+
+
+class ArrayIndex(object):
+	'''
+	Hash index of the first position of each value in an array, 
+	for finding values in O(1) when the same array comes in again.
+	It is built again for another array object or another length, 
+	so the array must not be changed in place otherwise
+	'''
+	def __init__(self):
+		self.array = None
+		self.length = 0
+		self.positions = None # value: index, or None for unhashable values
+	
+	def find(self, array, value):
+		'''
+		:returns: index of the first occurrence of the value in the array, or None
+		'''
+		if array is not self.array or len(array) != self.length:
+			self.array = array
+			self.length = len(array)
+			self.positions = {}
+			try:
+				for index, element in enumerate(array.tolist() if isNumpyArray(array) else array):
+					self.positions.setdefault(element, index)
+			except TypeError:
+				self.positions = None
+		if self.positions is None:
+			return findIndex(array, value)
+		try:
+			return self.positions.get(value)
+		except TypeError:
+			return findIndex(array, value) # unhashable value
+
+
+TYPECODES = {float: 'd', int: 'q' if sys.version_info >= (3, 3) else 'l', bool: 'b'}
+
+
+def scalarType(data):
+	'''
+	:returns: type of the data, for NumPy scalars bool, int or float
+	'''
+	if numpy is not None and isinstance(data, numpy.generic):
+		if isinstance(data, numpy.bool_):
+			return bool
+		if isinstance(data, numpy.integer):
+			return int
+		if isinstance(data, numpy.floating):
+			return float
+	return type(data)
+
+
+def bufferType(port, data):
+	'''
+	:param port: input port, the type of its connected output is preferred
+	:param data: first data item
+	:returns: element type of a typed buffer (float, int or bool), or None
+	'''
+	if port.isConnected() and port.connOutput.ptype.dtype in TYPECODES:
+		return port.connOutput.ptype.dtype
+	if port.ptype.dtype in TYPECODES:
+		return port.ptype.dtype
+	dtype = scalarType(data)
+	return dtype if dtype in TYPECODES else None
+
+
+def widerType(dtype, data):
+	'''
+	:param dtype: element type of a typed buffer (bool, int or float), or None
+	:returns: the narrowest of bool, int and float which can hold 
+		the elements of the buffer and the data, or None
+	'''
+	order = (bool, int, float)
+	dataType = scalarType(data)
+	if dtype not in order or dataType not in order:
+		return None
+	return order[max(order.index(dtype), order.index(dataType))]
+
+
+def newBuffer(dtype, length):
+	'''
+	:returns: uninitialized NumPy array, or else zeroed array.array
+	'''
+	if numpy is not None:
+		return numpy.empty(length, dtype)
+	return typedarray.array(TYPECODES[dtype], [dtype()])*length
+
+
+def copyNumbers(buf, source, length):
+	'''
+	Copies the first elements of a typed buffer into another one, e.g. of a wider type
+	'''
+	if isNumpyArray(buf):
+		buf[:length] = source[:length]
+	else:
+		buf[:length] = typedarray.array(buf.typecode, source[:length].tolist())
+
+
+class BufferPool(object):
+	'''
+	Typed buffers of a fixed length, which are reused as soon as nothing 
+	refers to them anymore but the pool. A buffer is referred to by any node 
+	keeping it, also by views or slices of it, as NumPy views refer to the array 
+	which owns the data. This needs reference counts like in CPython, 
+	else each buffer is new
+	'''
+	def __init__(self, dtype, length, size=8):
+		'''
+		:param dtype: element type (float, int or bool)
+		:param length: number of elements per buffer
+		:param size: maximum number of pooled buffers, more are allocated unpooled
+		'''
+		self.dtype = dtype
+		self.length = length
+		self.size = size
+		self.buffers = []
+		self.freeRefs = None # reference count of a free buffer in acquire
+		if hasattr(sys, 'getrefcount'):
+			# referenced only by a list, the loop and getrefcount, like in acquire
+			for probe in [newBuffer(dtype, 0)]:
+				self.freeRefs = sys.getrefcount(probe)
+	
+	def acquire(self):
+		'''
+		:returns: a pooled buffer which is not referred to anymore, or a new buffer
+		'''
+		if self.freeRefs is None:
+			return newBuffer(self.dtype, self.length)
+		for buf in self.buffers:
+			if sys.getrefcount(buf) <= self.freeRefs:
+				return buf
+		buf = newBuffer(self.dtype, self.length)
+		if len(self.buffers) < self.size:
+			self.buffers.append(buf)
+		return buf
+
 
 class StrSplit(Node):
 	'''
-	Splits a string by delimiter and pushes out the separated string parts
+	Splits a string by delimiter and pushes out the separated string parts.
+	For a list of strings (batch), the parts of all strings are pushed out as one list
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'String split')
 		self.addInput('string', ptype=Ptype.STR)
@@ -15,14 +203,19 @@ class StrSplit(Node):
 		self.strOut = self.addOutput('parts', Ptype.STR)
 	
 	def process(self, string, delimiter):
+		if isinstance(string, list):
+			self.strOut.push([part for line in string for part in line.split(delimiter)])
+			return
 		for part in string.split(delimiter):
 			self.strOut.push(part)
 
 
 class StrReplace(Node):
 	'''
-	Replaces a pattern in a string
+	Replaces a pattern in a string, or in each string of a list (batch)
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'String replace')
 		self.addInput('string', ptype=Ptype.STR)
@@ -31,19 +224,39 @@ class StrReplace(Node):
 		self.strOut = self.addOutput('modified', Ptype.STR)
 	
 	def process(self, string, find, replace):
-		self.strOut.push(string.replace(find, replace))
+		if isinstance(string, list):
+			self.strOut.push([line.replace(find, replace) for line in string])
+		else:
+			self.strOut.push(string.replace(find, replace))
 
 
 class StrToDict(Node):
 	'''
-	Converts a JSON formatted string to to a dictionary
+	Converts a JSON formatted string to to a dictionary, 
+	or a list of strings (batch) to a list of dictionaries
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'String to dictionary')
 		self.addInput('string', ptype=Ptype.STR)
 		self.dictOut = self.addOutput('dictionary', Ptype.DICT)
 	
 	def process(self, string):
+		if isinstance(string, list):
+			loads = json.loads
+			try:
+				dictionaries = [loads(line) for line in string]
+			except:
+				# find the invalid string for the message
+				for line in string:
+					try:
+						loads(line)
+					except:
+						raise TypeError('{} cannot convert {:.50}... to a dictionary'.format(self.name, line))
+				raise
+			self.dictOut.push(dictionaries)
+			return
 		try:
 			self.dictOut.push(json.loads(string))
 		except:
@@ -52,40 +265,199 @@ class StrToDict(Node):
 
 class DictToStr(Node):
 	'''
-	Converts dictionary to a JSON formatted string
+	Converts dictionary to a JSON formatted string.
+	With batch, a list of dictionaries is converted to a list of strings
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Dictionary to string')
 		self.addInput('dictionary', ptype=Ptype.DICT)
 		self.addInput('oneLine', False)
+		self.addInput('batch', False)
 		self.strOut = self.addOutput('string', Ptype.STR)
 	
-	def process(self, dictionary, oneLine):
+	def process(self, dictionary, oneLine, batch):
 		try:
 			pretty = None if oneLine else 4 # indent lines or not
-			self.strOut.push(json.dumps(dictionary, indent=pretty))
+			if batch and isinstance(dictionary, list):
+				encode = json.JSONEncoder(indent=pretty).encode
+				self.strOut.push([encode(item) for item in dictionary])
+			else:
+				self.strOut.push(json.dumps(dictionary, indent=pretty))
 		except:
 			raise TypeError('{} cannot convert {:.50}... to a string'.format(self.name, dictionary))
 
 
+class RegexNode(Node):
+	'''
+	Base for nodes with a regular expression pattern input.
+	Each pattern is compiled once per graph run
+	'''
+	def prepare(self):
+		self.compiled = {} # pattern: compiled regular expression
+	
+	def regex(self, pattern, ignoreCase=False):
+		'''
+		:param pattern: regular expression string
+		:param ignoreCase: True for case insensitive matching
+		:returns: compiled regular expression
+		'''
+		key = (pattern, ignoreCase)
+		regex = self.compiled.get(key)
+		if regex is None:
+			try:
+				regex = self.compiled[key] = re.compile(pattern, re.IGNORECASE if ignoreCase else 0)
+			except re.error as e:
+				raise ValueError('{} has an invalid pattern {}: {}'.format(self.name, pattern, e))
+		return regex
+
+
+class RegexMatch(RegexNode):
+	'''
+	Pushes out the strings in which the pattern is found, 
+	or with invert, those in which it is not found.
+	For a list of strings (batch), the list of these strings is pushed out
+	'''
+	pure = True
+	
+	def __init__(self):
+		Node.__init__(self, 'Regex match')
+		self.addInput('string', ptype=Ptype.STR)
+		self.addInput('pattern', '.*')
+		self.addInput('ignoreCase', False)
+		self.addInput('invert', False)
+		self.strOut = self.addOutput('matching', Ptype.STR)
+	
+	def process(self, string, pattern, ignoreCase, invert):
+		search = self.regex(pattern, ignoreCase).search
+		if isinstance(string, list):
+			if invert:
+				self.strOut.push([line for line in string if not search(line)])
+			else:
+				self.strOut.push([line for line in string if search(line)])
+		elif (search(string) is None) == invert:
+			self.strOut.push(string)
+
+
+class RegexExtract(RegexNode):
+	'''
+	Pushes out a group of the first match of the pattern in a string, 
+	nothing if not found.
+	For a list of strings (batch), the list of the found groups is pushed out
+	'''
+	pure = True
+	
+	def __init__(self):
+		Node.__init__(self, 'Regex extract')
+		self.addInput('string', ptype=Ptype.STR)
+		self.addInput('pattern', '(.*)')
+		self.addInput('group', 1) # group number or name, 0 for the whole match
+		self.addInput('ignoreCase', False)
+		self.strOut = self.addOutput('extracted', Ptype.STR)
+	
+	def process(self, string, pattern, group, ignoreCase):
+		search = self.regex(pattern, ignoreCase).search
+		if isinstance(string, list):
+			matches = [search(line) for line in string]
+			self.strOut.push([match.group(group) for match in matches if match])
+		else:
+			match = search(string)
+			if match:
+				self.strOut.push(match.group(group))
+
+
+class RegexReplace(RegexNode):
+	'''
+	Replaces the matches of a pattern in a string, or in each string of a list (batch).
+	The replacement may refer to groups like "\\1" or "\\g<name>"
+	'''
+	pure = True
+	
+	def __init__(self):
+		Node.__init__(self, 'Regex replace')
+		self.addInput('string', ptype=Ptype.STR)
+		self.addInput('pattern', '\\s+')
+		self.addInput('replace', ' ')
+		self.addInput('count', 0) # maximum number of replacements per string, 0 for all
+		self.addInput('ignoreCase', False)
+		self.strOut = self.addOutput('modified', Ptype.STR)
+	
+	def process(self, string, pattern, replace, count, ignoreCase):
+		sub = self.regex(pattern, ignoreCase).sub
+		if isinstance(string, list):
+			self.strOut.push([sub(replace, line, count) for line in string])
+		else:
+			self.strOut.push(sub(replace, string, count))
+
+
 class PackArray(Node):
 	'''
 	Fetches data and releases them as an array.
 	The array will be pushed out when reached length, or, 
 	if length < 1, when no elements are incoming anymore.
+	If typed and length is set, numbers are packed into typed arrays 
+	(NumPy arrays, or array.array without NumPy), 
+	which are widened e.g. from int to float for other numbers.
+	They are taken from a pool and reused when the receiving nodes 
+	do not refer to them anymore (see BufferPool).
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Pack array')
 		# build inputs and outputs
 		self.dataIn = self.addInput('elements')
 		self.addInput('length', 0)
+		self.addInput('typed', False)
 		self.arrOut = self.addOutput('array', Ptype.LIST)
+		self.pool = None # kept between runs
 	
 	def prepare(self):
 		# for collecting the elements
 		self.dataCollector = []
+		self.typedBuffer = None
+		self.numPacked = 0
 	
-	def process(self, elements, length):
+	def packTyped(self, elements, length):
+		'''
+		Packs into a typed buffer
+
+		:returns: False when the elements are no numbers
+		'''
+		pool = self.pool
+		if pool is None or pool.length != length:
+			dtype = widerType(bufferType(self.dataIn, elements), elements)
+		else:
+			dtype = widerType(pool.dtype, elements)
+		if dtype is None:
+			if self.typedBuffer is not None:
+				# continue with a list of the numbers so far
+				self.dataCollector = self.typedBuffer[:self.numPacked].tolist()
+				self.typedBuffer = None
+				self.numPacked = 0
+			return False
+		if pool is None or pool.length != length or dtype is not pool.dtype:
+			pool = self.pool = BufferPool(dtype, length)
+			if self.typedBuffer is not None:
+				buf = pool.acquire()
+				copyNumbers(buf, self.typedBuffer, self.numPacked)
+				self.typedBuffer = buf
+		if self.typedBuffer is None:
+			self.typedBuffer = pool.acquire()
+		self.typedBuffer[self.numPacked] = elements
+		self.numPacked += 1
+		if self.numPacked >= length:
+			buf = self.typedBuffer
+			self.typedBuffer = None
+			self.numPacked = 0
+			self.arrOut.push(buf)
+		return True
+	
+	def process(self, elements, length, typed):
+		if typed and length > 0 and not self.dataCollector:
+			if self.packTyped(elements, length):
+				return
 		self.dataCollector.append(elements) # collect elements
 		if length > 0:
 			# release buffered elements by length
@@ -103,6 +475,8 @@ class UnpackArray(Node):
 	Reads all elements from an array and pushes them out. 
 	It basically just unpacks the array
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Unpack array')
 		self.addInput('array', ptype=Ptype.LIST)
@@ -117,6 +491,8 @@ class IndexToValue(Node):
 	'''
 	Get a value based on index from an array
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Array value')
 		self.addInput('array', ptype=Ptype.LIST)
@@ -134,21 +510,31 @@ class ValueToIndex(Node):
 	'''
 	Get an index based on value from an array
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Array index')
 		self.addInput('array', ptype=Ptype.LIST)
 		self.addInput('value')
+		self.addInput('cached', False) # keep a hash index for the same array coming again
 		self.indOut = self.addOutput('index', Ptype.INT)
+		self.arrayIndex = ArrayIndex()
+	
+	def prepare(self):
+		self.arrayIndex = ArrayIndex() # don't keep old arrays
 	
-	def process(self, array, value):
-		if value in array:
-			self.indOut.push(array.index(value))
+	def process(self, array, value, cached):
+		index = self.arrayIndex.find(array, value) if cached else findIndex(array, value)
+		if index is not None:
+			self.indOut.push(index)
 
 
 class ArrayMax(Node):
 	'''
 	Get the maximum value and corresponding index from an array
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Maximum in array')
 		self.addInput('array', ptype=Ptype.LIST)
@@ -156,15 +542,17 @@ class ArrayMax(Node):
 		self.indOut = self.addOutput('index', Ptype.INT)
 	
 	def process(self, array):
-		val = max(array)
+		index, val = argExtremum(array, max)
 		self.valOut.push(val)
-		self.indOut.push(array.index(val))
+		self.indOut.push(index)
 
 
 class ArrayMin(Node):
 	'''
 	Get the minimum value and corresponding index from an array
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Minimum in array')
 		self.addInput('array', ptype=Ptype.LIST)
@@ -172,15 +560,17 @@ class ArrayMin(Node):
 		self.indOut = self.addOutput('index', Ptype.INT)
 	
 	def process(self, array):
-		val = min(array)
+		index, val = argExtremum(array, min)
 		self.valOut.push(val)
-		self.indOut.push(array.index(val))
+		self.indOut.push(index)
 
 
 class ArrayLength(Node):
 	'''
 	Get the length an array
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Array length')
 		self.addInput('array', ptype=Ptype.LIST)
@@ -192,18 +582,60 @@ class ArrayLength(Node):
 
 class ArrayAppend(Node):
 	'''
-	Adds an element to an array
+	Adds an element to an array.
+	If typed and no array is connected, numbers are appended to a typed buffer
+	with spare capacity, which is widened e.g. from int to float for other numbers.
+	With NumPy, a view of the filled part is pushed without copying, 
+	without NumPy each push allocates a copy of the filled part of the array.array.
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Append to Array')
 		self.arrIn = self.addInput('array', [])
-		self.addInput('data')
+		self.dataIn = self.addInput('data')
+		self.addInput('typed', False)
 		self.arrOut = self.addOutput('array', Ptype.LIST)
 	
 	def prepare(self):
 		self.arrIn.default = [] # to clean reference
+		self.typedBuffer = None
+		self.dtype = None # element type of the typed buffer
+		self.numAppended = 0
 	
-	def process(self, array, data):
+	def appendTyped(self, array, data):
+		'''
+		:param array: list to continue with, when the data does not fit into a typed buffer
+		:returns: False when the data is no number
+		'''
+		buf = self.typedBuffer
+		if buf is None:
+			dtype = widerType(bufferType(self.dataIn, data), data)
+		else:
+			dtype = widerType(self.dtype, data)
+		if dtype is None:
+			if buf is not None:
+				# continue with a list of the numbers so far
+				array.extend(buf[:self.numAppended].tolist())
+				self.typedBuffer = None
+				self.numAppended = 0
+			return False
+		if buf is None or dtype is not self.dtype or self.numAppended >= len(buf):
+			# grow by doubling, so appending is amortized O(1)
+			newBuf = newBuffer(dtype, max(16, 2*self.numAppended))
+			if buf is not None:
+				copyNumbers(newBuf, buf, self.numAppended)
+			buf = self.typedBuffer = newBuf
+			self.dtype = dtype
+		buf[self.numAppended] = data
+		self.numAppended += 1
+		self.arrOut.push(buf[:self.numAppended])
+		return True
+	
+	def process(self, array, data, typed):
+		if typed and not self.arrIn.isConnected() and not array:
+			if self.appendTyped(array, data):
+				return
 		array.append(data)
 		self.arrOut.push(array)
 
@@ -212,6 +644,8 @@ class ArrayRemove(Node):
 	'''
 	Removes an element of an array
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Remove from Array')
 		self.addInput('array', ptype=Ptype.LIST)
@@ -219,6 +653,13 @@ class ArrayRemove(Node):
 		self.arrOut = self.addOutput('array', Ptype.LIST)
 	
 	def process(self, array, data):
+		if isNumpyArray(array):
+			# NumPy arrays cannot shrink, so push a new one
+			index = findIndex(array, data)
+			if index is None:
+				raise ValueError('{} is not in the array'.format(data))
+			self.arrOut.push(numpy.delete(array, index))
+			return
 		array.remove(data)
 		self.arrOut.push(array)
 
@@ -227,6 +668,8 @@ class Replicate(Node):
 	'''
 	Replicate incoming data n times
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Replicate')
 		# build inputs and outputs
@@ -243,6 +686,8 @@ class Trigger(Node):
 	'''
 	Gates data behind any data at trigger port
 	'''
+	pure = True
+	
 	def __init__(self):
 		Node.__init__(self, 'Trigger')
 		self.dataIn = self.addInput('data')
@@ -254,13 +699,15 @@ class Trigger(Node):
 		self.repOut.push(data)
 		if reuseOldData and not self.dataIn.buffer:
 			# append old data to buffer again until fresh data is coming
-			self.dataIn.buffer.append(data)
+			self.dataIn.put(data)
 
 
 class Pause(Node):
 	'''
 	Sleeps blocking for specified seconds
 	'''
+	pure = False # the time passing is the purpose
+	
 	def __init__(self):
 		Node.__init__('Pause')
 		self.addInput('data')
@@ -291,6 +738,8 @@ class Timestamp(Node):
 	'''
 	Pushes a UTC timestamp out for every data incoming
 	'''
+	pure = False # the time changes
+	
 	def __init__(self):
 		Node.__init__(self, 'Timestamp')
 		self.addInput('data')
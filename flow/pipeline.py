@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Pipeline-parallel processing of a graph.
+The nodes are split into stages, each processing in its own thread.
+Data between stages is sent in batches through bounded queues,
+so e.g. reading a file and writing another one overlap.
+'''
+from __future__ import nested_scopes, generators, with_statement, unicode_literals, absolute_import, division, print_function
+
+from timeit import default_timer # for measuring costs and processing time
+import logging # for reporting the partitioning
+import threading # for running the stages
+try:
+	# for python 2
+	from Queue import Queue, Empty, Full
+except ImportError:
+	# for python 3
+	from queue import Queue, Empty, Full
+
+log = logging.getLogger(__name__)
+
+END = None # marks that an upstream stage has finished
+
+def measureCosts(graph):
+	'''
+	Processes the graph once and measures the time spent in each node
+
+	:param graph: graph to measure
+	:returns: dictionary with node name: processing time in seconds
+	'''
+	costs = dict((name, 0.) for name in graph.nodeDict)
+	lastTime = default_timer()
+	for node in graph._steps():
+		now = default_timer()
+		costs[node.name] += now-lastTime
+		lastTime = now
+	return costs
+
+
+class Channel(object):
+	'''
+	Collects data pushed from one stage to another and sends it in batches
+	'''
+	def __init__(self, pipeline, target, batchSize):
+		'''
+		:param pipeline: the pipeline, for stopping
+		:param target: the receiving stage
+		:param batchSize: number of items sent at once
+		'''
+		self.pipeline = pipeline
+		self.target = target
+		self.batchSize = batchSize
+		self.batch = [] # list of (input, data)
+	
+	def append(self, inp, data):
+		self.batch.append((inp, data))
+		if len(self.batch) >= self.batchSize:
+			self.flush()
+	
+	def flush(self):
+		'''
+		Sends the collected items, waits while the receiving stage is busy
+		'''
+		if self.batch:
+			self.target.send(self.batch)
+			self.batch = []
+
+
+class StageInput(object):
+	'''
+	Stands in for an input of another stage in the connections of an output,
+	so pushing data to it goes through a channel
+	'''
+	def __init__(self, inp, channel):
+		'''
+		:param inp: the real input in the other stage
+		:param channel: channel to that stage
+		'''
+		self.input = inp
+		self.channel = channel
+		# what an output uses of its connected inputs
+		self.node = inp.node
+		self.name = inp.name
+	
+	def put(self, data):
+		self.channel.append(self.input, data)
+
+
+class Stage(object):
+	'''
+	Part of the graph which processes in its own thread
+	'''
+	def __init__(self, pipeline, index, nodes, steps, queueSize):
+		'''
+		:param pipeline: the pipeline this stage belongs to
+		:param index: stage number
+		:param nodes: nodes in run order
+		:param steps: collect methods of the run steps of the graph for these nodes
+		:param queueSize: maximum number of batches waiting for this stage
+		'''
+		self.pipeline = pipeline
+		self.index = index
+		self.nodes = nodes
+		self.steps = steps
+		self.queue = Queue(queueSize)
+		self.channels = [] # outgoing channels
+		self.numUpstream = 0 # stages sending to this one
+		self.iterCount = 0
+		self.error = None
+	
+	def send(self, item):
+		'''
+		Puts a batch or END into the queue of this stage.
+		Blocks while it is full, unless the pipeline is stopped
+		'''
+		while not self.pipeline.stop.is_set():
+			try:
+				self.queue.put(item, timeout=0.1)
+				return
+			except Full:
+				pass
+	
+	def receive(self, block):
+		'''
+		Moves received batches into the input buffers
+
+		:param block: wait for the next batch if nothing was received yet
+		:returns: True when data was received
+		'''
+		received = False
+		while True:
+			try:
+				if block and not received:
+					item = self.queue.get(timeout=0.1)
+				else:
+					item = self.queue.get_nowait()
+			except Empty:
+				return received
+			if item is END:
+				self.numUpstream -= 1
+				continue
+			for inp, data in item:
+				inp.put(data)
+			received = True
+	
+	def run(self):
+		'''
+		Processes the nodes of this stage until all upstream stages
+		finished and nothing is left to do
+		'''
+		try:
+			stop = self.pipeline.stop
+			abort = self.pipeline.abort
+			while not stop.is_set():
+				if abort and abort.is_set():
+					stop.set()
+					break
+				self.receive(False)
+				for collect in self.steps:
+					collect()
+				self.iterCount += 1
+				if any(node.busy for node in self.nodes):
+					continue
+				# nothing to do, so send what we have and wait for more
+				for channel in self.channels:
+					channel.flush()
+				if self.numUpstream <= 0 and self.queue.empty():
+					break
+				self.receive(True)
+		except Exception as e:
+			self.error = e
+			self.pipeline.stop.set()
+		finally:
+			for channel in self.channels:
+				channel.target.send(END)
+
+
+class Pipeline(object):
+	'''
+	Processes a graph split into stages, each in its own thread,
+	connected by bounded queues which carry batches of data.
+	The stages are threads, so stages overlap while waiting for I/O
+	or while nodes release the GIL (e.g. in NumPy or file access).
+
+	Note that nodes which decide based on their input buffer being empty
+	(e.g. PackArray without length) may see an empty buffer while the
+	previous stage is still producing.
+	'''
+	def __init__(self, graph, numStages=2, stages=None, costs=None,
+			queueSize=16, batchSize=64):
+		'''
+		:param graph: graph to process
+		:param numStages: number of stages for automatic partitioning
+		:param stages: optional manual assignment like {node name: stage number},
+			which overrides the automatic one for the given nodes
+		:param costs: optional cost estimates like {node name: cost},
+			else the "cost" attribute of the nodes is used (see also measureCosts)
+		:param queueSize: maximum number of batches waiting for a stage
+		:param batchSize: number of data items sent between stages at once
+		'''
+		self.graph = graph
+		self.numStages = numStages
+		self.stageOverrides = stages or {}
+		self.costs = costs or {}
+		self.queueSize = queueSize
+		self.batchSize = batchSize
+		self.stop = threading.Event()
+		self.abort = None
+	
+	def partition(self):
+		'''
+		Splits the run steps of the prepared graph into stages of about the same cost.
+		The nodes of a step, e.g. a fused chain or a loop, stay in one stage.
+		Stages with connections back to a previous stage (loops) are merged.
+
+		:returns: list of node lists
+		'''
+		graph = self.graph
+		if not graph.prepared:
+			graph.prepare()
+		runOrder = graph.nodesRunOrder
+		# nodes of each step, see Graph.prepare
+		steps = [getattr(collect.__self__, 'nodes', [node]) for node, collect in graph.runSteps]
+		costs = [sum(self.costs.get(node.name, node.cost) for node in nodes) for nodes in steps]
+		target = sum(costs)/max(1, self.numStages)
+		stageOf = {}
+		stage = 0
+		stageCost = 0.
+		for nodes, cost in zip(steps, costs):
+			if stageCost > 0 and stageCost+cost/2. > target and stage < self.numStages-1:
+				stage += 1
+				stageCost = 0.
+			overrides = [self.stageOverrides[node.name] for node in nodes 
+				if node.name in self.stageOverrides]
+			for node in nodes:
+				stageOf[node] = min(overrides) if overrides else stage
+			stageCost += cost
+		
+		# data must only flow forward, so merge stages for backward connections
+		merged = True
+		while merged:
+			merged = False
+			for node in runOrder:
+				for inp in node.inputs:
+					if inp.isConnected():
+						srcStage = stageOf[inp.connOutput.node]
+						if srcStage > stageOf[node]:
+							low, high = stageOf[node], srcStage
+							for other in runOrder:
+								if low <= stageOf[other] <= high:
+									stageOf[other] = low
+							merged = True
+		
+		stages = []
+		for stageNum in sorted(set(stageOf.values())):
+			stages.append([node for node in runOrder if stageOf[node] == stageNum])
+		return stages
+	
+	def process(self, abort=None):
+		'''
+		Processes the graph with all stages in parallel until all are finished
+
+		:param abort: object with an "is_set()" method,
+			which must return True or False
+		:returns: result dictionary, number of iterations of the
+			busiest stage, processing time
+		'''
+		graph = self.graph
+		self.abort = abort
+		self.stop.clear()
+		
+		stages = []
+		stageOf = {}
+		for nodes in self.partition():
+			inStage = set(nodes)
+			steps = [collect for node, collect in graph.runSteps if node in inStage]
+			stage = Stage(self, len(stages), nodes, steps, self.queueSize)
+			stages.append(stage)
+			for node in nodes:
+				stageOf[node] = stage
+		log.info('Pipeline stages: {}'.format(' | '.join(
+			', '.join(node.name for node in stage.nodes) for stage in stages)))
+		
+		# replace connections between stages by channels
+		replaced = [] # (output, original connected inputs)
+		for stage in stages:
+			channels = {}
+			for node in stage.nodes:
+				for out in node.outputs:
+					if all(stageOf[inp.node] is stage for inp in out.connInputs):
+						continue
+					replaced.append((out, out.connInputs))
+					connInputs = []
+					for inp in out.connInputs:
+						target = stageOf[inp.node]
+						if target is stage:
+							connInputs.append(inp)
+							continue
+						if target not in channels:
+							channels[target] = Channel(self, target, self.batchSize)
+							target.numUpstream += 1
+						connInputs.append(StageInput(inp, channels[target]))
+					out.connInputs = connInputs
+			stage.channels = list(channels.values())
+		# folded nodes replay to the inputs of other stages through the channels too
+		foldedNodes = graph.startFolded()
+		for folded in foldedNodes:
+			folded.prepare(set(graph.folded[1]))
+		
+		startTime = default_timer()
+		try:
+			threads = [threading.Thread(target=stage.run) for stage in stages]
+			for thread in threads:
+				thread.start()
+			for thread in threads:
+				thread.join()
+		finally:
+			# restore the original connections
+			for out, connInputs in replaced:
+				out.connInputs = connInputs
+			graph.prepared = False
+			graph.stopFolded(foldedNodes, not self.stop.is_set())
+			for node in graph.nodes:
+				node.finish()
+		procTime = default_timer()-startTime
+		
+		for stage in stages:
+			if stage.error:
+				raise stage.error
+		iterCount = max(stage.iterCount for stage in stages) if stages else 0
+		return graph.getResults(), iterCount, procTime
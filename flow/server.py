@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Serves preloaded graphs on a local HTTP server.
+Each request supplies input default values and gets the graph results, e.g.:
+	python -m flow serve examples/loop.json --port 8080
+	curl -d '{"Float out.value": 3}' localhost:8080/graphs/loop
+'''
+from __future__ import nested_scopes, generators, with_statement, unicode_literals, absolute_import, division, print_function
+
+from .graph import Graph, GraphTemplate, UnknownInputError
+import json # for request and response bodies
+import logging # for reporting failed requests
+import threading # for the graph instances and the load generator
+from timeit import default_timer # for measuring latencies
+import os.path as putil # for naming graphs by file name
+try:
+	# for python 2
+	from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+	from SocketServer import ThreadingMixIn
+	from Queue import Queue
+	from urllib2 import urlopen, Request as UrlRequest
+except ImportError:
+	# for python 3
+	from http.server import HTTPServer, BaseHTTPRequestHandler
+	from socketserver import ThreadingMixIn
+	from queue import Queue
+	from urllib.request import urlopen, Request as UrlRequest
+
+log = logging.getLogger(__name__)
+
+class Request(object):
+	'''
+	Pending request for a served graph
+	'''
+	def __init__(self, defaults):
+		'''
+		:param defaults: dictionary like {"nodeName.inputName": value}
+		'''
+		self.defaults = defaults
+		self.results = None
+		self.error = None
+		self.done = threading.Event()
+
+
+class ServedGraph(object):
+	'''
+	A graph with a pool of warmed copies, each processing requests in its own thread.
+	Each free copy takes the next waiting request, so requests waiting at the 
+	same time are processed in parallel. The nodes have no batched processing, 
+	so taking several requests at once would only process them one after another.
+	A copy keeps its run order and loops between requests, as only the defaults change
+	'''
+	def __init__(self, graph, instances=2):
+		'''
+		:param graph: graph to serve
+		:param instances: number of graph copies processing in parallel
+		'''
+		self.template = GraphTemplate(graph)
+		self.requests = Queue()
+		self.lock = threading.Lock()
+		self.numRequests = [0]*instances # per copy
+		self.threads = []
+		for index in range(instances):
+			instance = self.template.instantiate()
+			instance.process() # warm up, e.g. for lazy imports in the nodes
+			thread = threading.Thread(target=self.work, args=(instance, index))
+			thread.daemon = True
+			thread.start()
+			self.threads.append(thread)
+	
+	def work(self, instance, index):
+		'''
+		Processes requests on a graph copy until stopped
+
+		:param instance: the graph copy
+		:param index: number of the copy for the statistics
+		'''
+		while True:
+			req = self.requests.get()
+			if req is None:
+				return
+			with self.lock:
+				self.numRequests[index] += 1
+			try:
+				req.results = instance.processWith(req.defaults)
+			except Exception as e:
+				req.error = e
+			req.done.set()
+	
+	def request(self, defaults, timeout=None):
+		'''
+		Processes the graph with input default values. Can be called from any thread.
+
+		:param defaults: dictionary like {"nodeName.inputName": value}
+		:param timeout: maximum time in seconds to wait for the results
+		:returns: result list like from Graph.getResults
+		'''
+		req = Request(defaults)
+		self.requests.put(req)
+		if not req.done.wait(timeout):
+			raise RuntimeError('Request timed out')
+		if req.error:
+			raise req.error
+		return req.results
+	
+	def stats(self):
+		'''
+		:returns: dictionary with the number of requests in total and per graph copy
+		'''
+		with self.lock:
+			return {'requests': sum(self.numRequests), 'perInstance': list(self.numRequests),
+				'instances': len(self.threads)}
+	
+	def stop(self):
+		'''
+		Stops the threads after the pending requests
+		'''
+		for _ in self.threads:
+			self.requests.put(None)
+		for thread in self.threads:
+			thread.join()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+	'''
+	GET /graphs lists the graphs, GET /stats shows the statistics
+	and POST /graphs/<name> processes a graph with
+	the JSON body {"nodeName.inputName": value, ...} as defaults
+	'''
+	def sendJson(self, obj, status=200):
+		body = json.dumps(obj, default=str).encode('utf-8')
+		self.send_response(status)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+	
+	def do_GET(self):
+		graphs = self.server.graphs
+		if self.path.rstrip('/') == '/graphs':
+			self.sendJson(sorted(graphs.keys()))
+		elif self.path.rstrip('/') == '/stats':
+			self.sendJson(dict((name, served.stats()) for name, served in graphs.items()))
+		else:
+			self.sendJson({'error': 'Unknown path {}'.format(self.path)}, 404)
+	
+	def do_POST(self):
+		name = self.path.rstrip('/')[len('/graphs/'):]
+		served = self.server.graphs.get(name)
+		if not self.path.startswith('/graphs/') or served is None:
+			self.sendJson({'error': 'No graph at {}'.format(self.path)}, 404)
+			return
+		length = int(self.headers.get('Content-Length') or 0)
+		try:
+			body = self.rfile.read(length).decode('utf-8')
+			defaults = json.loads(body) if body.strip() else {}
+			if not isinstance(defaults, dict):
+				raise ValueError('Body must be a JSON object')
+		except ValueError as e:
+			self.sendJson({'error': 'Invalid request: {}'.format(e)}, 400)
+			return
+		startTime = default_timer()
+		try:
+			results = served.request(defaults)
+		except UnknownInputError as e:
+			self.sendJson({'error': e.args[0]}, 400)
+			return
+		except Exception as e:
+			log.exception('Processing graph {} failed'.format(name))
+			self.sendJson({'error': '{}: {}'.format(type(e).__name__, e)}, 500)
+			return
+		self.sendJson({'results': results, 'time': default_timer()-startTime})
+	
+	def log_message(self, format, *args):
+		log.info(format % args) # instead of writing every request to stderr
+
+
+class GraphServer(ThreadingMixIn, HTTPServer):
+	'''
+	Local HTTP server for preloaded graphs
+	'''
+	daemon_threads = True
+	request_queue_size = 128 # for many concurrent clients
+	
+	def __init__(self, graphs, host='127.0.0.1', port=8080, instances=2):
+		'''
+		:param graphs: dictionary with name: graph file path or Graph
+		:param host: address to bind to, only local by default
+		:param port: port to listen on, 0 for any free port
+		:param instances: number of graph copies per graph
+		'''
+		self.graphs = {}
+		for name, graph in graphs.items():
+			if not isinstance(graph, Graph):
+				graph = Graph(graph)
+			self.graphs[name] = ServedGraph(graph, instances)
+		HTTPServer.__init__(self, (host, port), RequestHandler)
+	
+	@property
+	def url(self):
+		return 'http://{}:{}'.format(*self.server_address[:2])
+	
+	def server_close(self):
+		HTTPServer.server_close(self)
+		for served in self.graphs.values():
+			served.stop()
+
+
+def graphName(path):
+	'''
+	:returns: name for a graph file, e.g. "loop" for "examples/loop.json"
+	'''
+	return putil.splitext(putil.basename(path))[0]
+
+
+def percentile(sortedValues, fraction):
+	'''
+	:param sortedValues: ascending list
+	:param fraction: 0...1, e.g. 0.99 for the 99th percentile
+	'''
+	index = min(len(sortedValues)-1, int(round(fraction*(len(sortedValues)-1))))
+	return sortedValues[index]
+
+
+def loadTest(url, defaults=None, requests=1000, concurrency=8):
+	'''
+	Sends requests to a served graph and measures the latencies
+
+	:param url: graph url like "http://127.0.0.1:8080/graphs/loop"
+	:param defaults: dictionary like {"nodeName.inputName": value} for all requests
+	:param requests: total number of requests
+	:param concurrency: number of clients sending at the same time
+	:returns: dictionary with throughput and latency percentiles in seconds
+	'''
+	body = json.dumps(defaults or {}).encode('utf-8')
+	latencies = []
+	errors = [0]
+	lock = threading.Lock()
+	counter = iter(range(requests))
+	
+	def client():
+		while True:
+			with lock:
+				if next(counter, None) is None:
+					return
+			startTime = default_timer()
+			try:
+				urlopen(UrlRequest(url, body, {'Content-Type': 'application/json'})).read()
+			except Exception:
+				with lock:
+					errors[0] += 1
+				continue
+			latency = default_timer()-startTime
+			with lock:
+				latencies.append(latency)
+	
+	startTime = default_timer()
+	clients = [threading.Thread(target=client) for _ in range(concurrency)]
+	for thread in clients:
+		thread.start()
+	for thread in clients:
+		thread.join()
+	duration = default_timer()-startTime
+	
+	latencies.sort()
+	stats = {'requests': len(latencies), 'errors': errors[0], 'duration': duration,
+		'throughput': len(latencies)/duration if duration else 0.}
+	if latencies:
+		for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.)):
+			stats[name] = percentile(latencies, fraction)
+	return stats
@@ -0,0 +1,113 @@
+'''
+Writes arrays with the array sink and checks the .npy files, 
+and checks the reuse of typed buffers,
+with NumPy if installed, else only the checks without NumPy are run.
+Run from the package directory: python test_arrays.py
+'''
+import sys
+import os # for removing the written files
+import tempfile # for a directory to write to
+from flow import Graph # for processing the sink
+from flow.arrayfile import readHeader, fromBytes
+from flow.nodes.utility import BufferPool
+try:
+	import numpy # for the checks with NumPy arrays
+except ImportError:
+	numpy = None
+
+def writeBlocks(filepath, blocks, append=False):
+	'''
+	Writes the blocks with an array sink, one per graph run, appending after the first
+
+	:param append: also append the first block to the existing file
+	'''
+	graph = Graph()
+	sink = graph.addNode(graph.nodeFromDatabase('flow.nodes.sinks.ArraySink'))
+	sink.input['filepath'].default = filepath
+	for index, block in enumerate(blocks):
+		sink.input['array'].default = block
+		sink.input['append'].default = append or index > 0
+		graph.process()
+
+
+def readFile(filepath):
+	'''
+	:returns: type string, shape and the numbers as list
+	'''
+	with open(filepath, 'rb') as file:
+		descr, shape, _, size = readHeader(file)
+		file.seek(size)
+		return descr, shape, list(fromBytes(file.read(), descr))
+
+
+def reusedWhileReferred(refer):
+	'''
+	:param refer: function(buffer) returning something referring to the buffer, e.g. a slice
+	:returns: True when the pool lends out the buffer again while it is referred to
+	'''
+	pool = BufferPool(float, 4)
+	buf = pool.acquire()
+	reference = refer(buf)
+	del buf
+	return pool.acquire() is pool.buffers[0]
+
+
+def check(name, condition):
+	print('{}: {}'.format('ok' if condition else 'FAILED', name))
+	return condition
+
+
+if __name__ == '__main__':
+	passed = True
+	directory = tempfile.mkdtemp()
+	filepath = os.path.join(directory, 'rows.npy')
+
+	writeBlocks(filepath, [[[1, 2, 3], [4, 5, 6]], [[7, 8, 9]]])
+	passed &= check('nested lists are written as rows',
+		readFile(filepath)[1:] == ((3, 3), list(range(1, 10))))
+	try:
+		writeBlocks(filepath, [[[1, 2], [3]]])
+		passed &= check('rows of different shapes are rejected', False)
+	except ValueError:
+		passed &= check('rows of different shapes are rejected', True)
+	try:
+		writeBlocks(filepath, [[[1, 2, 3]], [[1, 2]]])
+		passed &= check('appending rows of another shape is rejected', False)
+	except ValueError:
+		passed &= check('appending rows of another shape is rejected', True)
+
+	passed &= check('pooled buffers are reused when not referred to anymore',
+		reusedWhileReferred(lambda buf: None) or not hasattr(sys, 'getrefcount'))
+	passed &= check('pooled buffers are not reused while referred to by a memoryview',
+		not reusedWhileReferred(memoryview))
+
+	if numpy is None:
+		print('skipped: checks with NumPy, as it is not installed')
+	else:
+		for name, refer in (('slice', lambda buf: buf[1:]), ('reshaped view', lambda buf: buf.reshape(2, 2)), 
+				('transposed view', lambda buf: buf.reshape(2, 2).T)):
+			passed &= check('pooled buffers are not reused while referred to by a {}'.format(name),
+				not reusedWhileReferred(refer))
+		graph = Graph()
+		source = graph.addNode(graph.nodeFromDatabase('flow.nodes.utility.UnpackArray'))
+		source.input['array'].default = [numpy.int64(1), numpy.int64(2), numpy.float64(2.5)]
+		pack = graph.addNode(graph.nodeFromDatabase('flow.nodes.utility.PackArray'))
+		pack.input['elements'].connect(source.output['elements'])
+		pack.input['length'].default = 3
+		pack.input['typed'].default = True
+		results = graph.process()[0]
+		packed = [res['result'] for res in results if res['node'] == pack.name][0]
+		passed &= check('NumPy scalars are packed into a widened typed buffer',
+			isinstance(packed, numpy.ndarray) and packed.tolist() == [1., 2., 2.5])
+		writeBlocks(filepath, [numpy.arange(6.).reshape(2, 3), [[6., 7., 8.]]])
+		loaded = numpy.load(filepath)
+		passed &= check('NumPy arrays and lists are written as rows',
+			loaded.shape == (3, 3) and loaded.tolist() == [[0., 1., 2.], [3., 4., 5.], [6., 7., 8.]])
+		numpy.save(filepath, numpy.arange(4, dtype='int64').reshape(2, 2))
+		writeBlocks(filepath, [numpy.array([[4, 5]])], append=True)
+		passed &= check('appending to a file written by NumPy',
+			numpy.load(filepath).tolist() == [[0, 1], [2, 3], [4, 5]])
+
+	os.remove(filepath)
+	os.rmdir(directory)
+	sys.exit(0 if passed else 1)
@@ -0,0 +1,178 @@
+'''
+Processes the example graphs several times and checks their results,
+so folding constant nodes, fusing chains of operations and processing loops
+give the same results as processing each node.
+Run from the package directory: python test_examples.py
+'''
+import sys
+import copy # for copying a node
+from flow import Graph # for loading the examples
+from flow.graph import GraphTemplate # for copying a graph
+from flow.pipeline import Pipeline # for processing in stages
+from flow.node import Node # for a node summing up its data
+
+class Total(Node):
+	'''
+	Adds the data into a list and pushes out the total when the graph finished
+	'''
+	def __init__(self):
+		Node.__init__(self, 'Total')
+		self.addInput('data')
+		self.listOut = self.addOutput('list')
+		self.totalOut = self.addOutput('total')
+		self.items = []
+	
+	def process(self, data):
+		self.items.append(data)
+		self.listOut.push(self.items)
+	
+	def finish(self):
+		self.totalOut.push(sum(self.items))
+
+# results of the unconnected outputs: {(node name, output name): result}
+EXPECTED = {
+	'examples/array.json': {
+		('Pack array.1', 'array'): [[1, 3, 5], [7, 9, 11], [13, 15, 17]],
+		('Print', 'formatted'): '[13, 15, 17]',
+		('Print.1', 'formatted'): '19'},
+	'examples/trigger.json': {
+		('Pack array', 'array'): [[2, 4], [2, 4], [2, 4]],
+		('Print', 'formatted'): '[0.0, 0.5, 1.0]'},
+	'examples/loop.json': {
+		('Print', 'formatted'): '16.0'},
+	'examples/fusion.json': {
+		('Print', 'formatted'):
+			'[0.43429448190325176, 0.8685889638065035, 1.3028834457097553, 1.737177927613007]'},
+}
+
+def results(resList):
+	return dict(((res['node'], res['output']), res['result']) for res in resList)
+
+
+def stepTypes(graph):
+	'''
+	:returns: set of the class names of the run steps, e.g. "FoldedNode" or "FusedChain"
+	'''
+	return set(type(collect.__self__).__name__ for _, collect in graph.runSteps)
+
+
+def streamed():
+	'''
+	Streams the data of an int range source summed up by a Total node
+
+	:returns: the streamed values and the history of the list output
+	'''
+	graph = Graph()
+	source = graph.addNode(graph.nodeFromDatabase('flow.nodes.sources.IntegerRangeSource'))
+	source.input['stop'].default = 4
+	total = graph.addNode(Total())
+	total.input['data'].connect(source.output['elements'])
+	values = [value for node, _, value in graph.stream(history=2) if node is total]
+	history = [res['history'] for res in graph.getResults() if res['output'] == 'list']
+	return values, history[0]
+
+
+def bufferCounts():
+	'''
+	Changes the buffer of an input in the ways nodes do
+
+	:returns: list of the number of filled inputs of the node after each change
+	'''
+	node = Total()
+	inp = node.input['data']
+	counts = []
+	inp.buffer = [1, 2]
+	counts.append(node.numFilled)
+	inp.buffer += [3]
+	counts.append(node.numFilled)
+	del inp.buffer[:]
+	counts.append(node.numFilled)
+	inp.buffer.extend([4])
+	copied = copy.deepcopy(node)
+	copied.input['data'].pull()
+	counts += [copied.numFilled, node.numFilled]
+	return counts
+
+
+def templateCopies(filepath):
+	'''
+	Makes a template of the graph, then changes the graph
+
+	:returns: True when a copy from the template has the options and defaults of before
+	'''
+	graph = Graph(filepath)
+	graph.fuseOperations = False
+	graph.setLoopOptions(list(graph.nodes)[0].name, maxIterations=5)
+	template = GraphTemplate(graph)
+	inputs = [inp for node in graph.nodes for inp in node.inputs if isinstance(inp.default, dict)]
+	inputs[0].default['changed'] = True
+	graph.fuseOperations = True
+	instance = template.instantiate()
+	return not instance.fuseOperations and instance.loopOptions == graph.loopOptions and \
+		not any(isinstance(inp.default, dict) and 'changed' in inp.default 
+		for node in instance.nodes for inp in node.inputs)
+
+
+def check(name, condition):
+	print('{}: {}'.format('ok' if condition else 'FAILED', name))
+	return condition
+
+
+def endlessLoopBacklog(iterations=50):
+	'''
+	Processes a counter loop, which never ends, into a Print node
+
+	:returns: the most data items waiting in the buffer of the Print node
+	'''
+	graph = Graph()
+	counter = graph.addNode(graph.nodeFromDatabase('flow.nodes.operations.Add'))
+	counter.input['a'].connect(counter.output['c'])
+	sink = graph.addNode(graph.nodeFromDatabase('flow.nodes.sinks.Print'))
+	sink.input['data'].connect(counter.output['c'])
+	mostWaiting = 0
+	steps = graph._steps()
+	for _ in steps:
+		mostWaiting = max(mostWaiting, len(sink.input['data'].buffer))
+		if graph.iterCount >= iterations:
+			break
+	steps.close()
+	return mostWaiting
+
+
+if __name__ == '__main__':
+	passed = True
+	for filepath, expected in sorted(EXPECTED.items()):
+		graph = Graph(filepath)
+		runs = []
+		for _ in range(3):
+			# 1st run processes, 2nd records constant nodes, 3rd replays them
+			runs.append((results(graph.process()[0]), stepTypes(graph)))
+		for index, (res, _) in enumerate(runs):
+			passed &= check('{} run {}'.format(filepath, index+1), res == expected)
+		if filepath == 'examples/loop.json':
+			passed &= check('{} processes the loop as one step'.format(filepath),
+				'LoopRegion' in runs[0][1])
+		else:
+			passed &= check('{} folds constant nodes'.format(filepath),
+				runs[0][1] != runs[2][1] and 'FoldedNode' in runs[2][1])
+		if filepath == 'examples/fusion.json':
+			passed &= check('{} fuses the chain'.format(filepath), 'FusedChain' in runs[0][1])
+			graph.foldConstants = False
+			graph.fuseOperations = False
+			passed &= check('{} without folding and fusing'.format(filepath),
+				results(graph.process()[0]) == expected)
+
+		graph = Graph(filepath)
+		passed &= check('{} in 2 pipeline stages'.format(filepath),
+			results(Pipeline(graph, 2).process()[0]) == expected)
+	values, history = streamed()
+	passed &= check('stream yields copies and the values pushed out when finished',
+		values == [[1], [1, 2], [1, 2, 3], 6])
+	passed &= check('history keeps copies', history == [[1, 2], [1, 2, 3]])
+	passed &= check('changing buffers keeps the number of filled inputs right',
+		bufferCounts() == [1, 1, 0, 0, 1])
+	passed &= check('copies from a template keep the options and defaults',
+		templateCopies('examples/dict.json'))
+	passed &= check('endless loop keeps the buffer of the receiving node small', 
+		endlessLoopBacklog() <= 1)
+	sys.exit(0 if passed else 1)